@@ -0,0 +1,39 @@
+"""Add item owner_id index
+
+Revision ID: 8b2d4e6f1a37
+Revises: 5f3c9b1e7a24
+Create Date: 2026-10-17 15:40:12.918273
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = '8b2d4e6f1a37'
+down_revision = '5f3c9b1e7a24'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # CONCURRENTLY can't run inside a transaction, it builds the index
+    # without blocking writes to item. A failed build leaves an invalid
+    # index behind, drop it before retrying.
+    with op.get_context().autocommit_block():
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS ix_item_owner_id_id')
+        op.create_index(
+            'ix_item_owner_id_id',
+            'item',
+            ['owner_id', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_item_owner_id_id', table_name='item', postgresql_concurrently=True
+        )
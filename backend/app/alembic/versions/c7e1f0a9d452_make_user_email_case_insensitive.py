@@ -0,0 +1,48 @@
+"""Make user email unique case-insensitively
+
+Revision ID: c7e1f0a9d452
+Revises: 8b2d4e6f1a37
+Create Date: 2026-10-17 18:05:41.337102
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+
+
+# revision identifiers, used by Alembic.
+revision = 'c7e1f0a9d452'
+down_revision = '8b2d4e6f1a37'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Existing emails are kept as they are. The build fails if two of them
+    # differ only in case, merge or rename those accounts first.
+    with op.get_context().autocommit_block():
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS ix_user_email_lower')
+        op.create_index(
+            'ix_user_email_lower',
+            'user',
+            [sa.text('lower(email)')],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_user_email', table_name='user', postgresql_concurrently=True
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_user_email',
+            'user',
+            ['email'],
+            unique=True,
+            postgresql_concurrently=True,
+        )
+        op.drop_index(
+            'ix_user_email_lower', table_name='user', postgresql_concurrently=True
+        )
@@ -0,0 +1,56 @@
+"""Add item full-text search
+
+Revision ID: f3a8d6c2b915
+Revises: c7e1f0a9d452
+Create Date: 2026-10-17 21:12:09.584310
+
+"""
+from alembic import op
+import sqlalchemy as sa
+import sqlmodel.sql.sqltypes
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = 'f3a8d6c2b915'
+down_revision = 'c7e1f0a9d452'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    # Kept up to date by Postgres on every write. Adding a stored generated
+    # column rewrites item under an exclusive lock, plan a maintenance window
+    # for large tables.
+    op.add_column(
+        'item',
+        sa.Column(
+            'search_vector',
+            postgresql.TSVECTOR(),
+            sa.Computed(
+                "setweight(to_tsvector('simple', coalesce(title, '')), 'A') || "
+                "setweight(to_tsvector('simple', coalesce(description, '')), 'B')",
+                persisted=True,
+            ),
+            nullable=True,
+        ),
+    )
+    # The index is built without blocking writes, see 8b2d4e6f1a37
+    with op.get_context().autocommit_block():
+        op.execute('DROP INDEX CONCURRENTLY IF EXISTS ix_item_search_vector')
+        op.create_index(
+            'ix_item_search_vector',
+            'item',
+            ['search_vector'],
+            unique=False,
+            postgresql_using='gin',
+            postgresql_concurrently=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_item_search_vector', table_name='item', postgresql_concurrently=True
+        )
+    op.drop_column('item', 'search_vector')
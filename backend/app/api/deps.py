@@ -1,16 +1,34 @@
-from collections.abc import Generator
+import hashlib
+import time
+import uuid
+from collections.abc import AsyncGenerator, Generator
+from dataclasses import dataclass
 from typing import Annotated
 
-import jwt
-from fastapi import Depends, HTTPException, status
+from fastapi import Depends, HTTPException, Request, status
 from fastapi.security import OAuth2PasswordBearer
 from jwt.exceptions import InvalidTokenError
 from pydantic import ValidationError
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import make_transient_to_detached
 from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app.core import security
+from app.core.cache import principal_cache, token_cache
 from app.core.config import settings
-from app.core.db import engine
+from app.core.db import engine, new_async_session
+from app.core.pagination import CountMode, Page, decode_cursor
+from app.core.replica import bind_principal
+from app.core.revocation import revocation_list
+from app.core.timeouts import (
+    DEADLINE_HEADER,
+    InvalidDeadline,
+    is_query_canceled,
+    set_statement_timeout,
+    statement_timeout,
+    statement_timeout_exception,
+)
 from app.models import TokenPayload, User
 
 reusable_oauth2 = OAuth2PasswordBearer(
@@ -18,27 +36,117 @@ reusable_oauth2 = OAuth2PasswordBearer(
 )
 
 
-def get_db() -> Generator[Session, None, None]:
+def get_statement_timeout(request: Request) -> int | None:
+    """
+    Statement timeout of the route in milliseconds, lowered by the client's
+    X-Request-Deadline. None keeps the connection default.
+    """
+    route = request.scope.get("route")
+    try:
+        return statement_timeout(
+            getattr(route, "unique_id", None), request.headers.get(DEADLINE_HEADER)
+        )
+    except InvalidDeadline as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+StatementTimeoutDep = Annotated[int | None, Depends(get_statement_timeout)]
+
+
+def get_db(timeout: StatementTimeoutDep) -> Generator[Session, None, None]:
     with Session(engine) as session:
-        yield session
+        if timeout is not None:
+            set_statement_timeout(session, timeout)
+        try:
+            yield session
+        except DBAPIError as e:
+            if is_query_canceled(e):
+                raise statement_timeout_exception(timeout) from e
+            raise
+
+
+async def get_async_db(
+    request: Request, timeout: StatementTimeoutDep
+) -> AsyncGenerator[AsyncSession, None]:
+    # Read-only requests may be served by a replica
+    read_only = request.method in ("GET", "HEAD")
+    async with new_async_session(read_only=read_only) as session:
+        if timeout is not None:
+            set_statement_timeout(session.sync_session, timeout)
+        try:
+            yield session
+        except DBAPIError as e:
+            # Canceled by statement_timeout, the connection goes back to the pool
+            if is_query_canceled(e):
+                raise statement_timeout_exception(timeout) from e
+            raise
 
 
 SessionDep = Annotated[Session, Depends(get_db)]
+AsyncSessionDep = Annotated[AsyncSession, Depends(get_async_db)]
 TokenDep = Annotated[str, Depends(reusable_oauth2)]
 
 
-def get_current_user(session: SessionDep, token: TokenDep) -> User:
+async def load_user(session: AsyncSession, user_id: uuid.UUID) -> User | None:
+    """
+    Load a user through the principal cache.
+
+    On a hit the cached column snapshot is attached to the session as a
+    detached instance, so no query is issued.
+    """
+    cached = principal_cache.get(user_id)
+    if cached is not None:
+        cached_user = User(**cached)
+        make_transient_to_detached(cached_user)
+        session.add(cached_user)
+        return cached_user
+    user = await session.get(User, user_id)
+    if user:
+        principal_cache.set(user_id, user.model_dump())
+    return user
+
+
+def decode_token(token: str) -> TokenPayload:
+    """
+    Verify and parse a JWT, reusing earlier results for the same token.
+    """
+    key = hashlib.sha256(token.encode()).digest()
+    token_data = token_cache.get(key)
+    if token_data is None:
+        payload = security.decode_jwt(token)
+        token_data = TokenPayload(**payload)
+        if "exp" in payload:
+            token_cache.set(key, token_data, ttl=payload["exp"] - time.time())
+    return token_data
+
+
+async def parse_token(
+    session: AsyncSession, token: str, token_type: str = "access"
+) -> tuple[TokenPayload, uuid.UUID]:
     try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
+        token_data = decode_token(token)
+        user_id = uuid.UUID(str(token_data.sub))
+    except (InvalidTokenError, ValidationError, ValueError):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Could not validate credentials",
         )
-        token_data = TokenPayload(**payload)
-    except (InvalidTokenError, ValidationError):
+    if token_data.type != token_type:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Could not validate credentials",
         )
-    user = session.get(User, token_data.sub)
+    bind_principal(session, user_id)
+    if await revocation_list.is_revoked(session, token_data.jti):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN, detail="Token has been revoked"
+        )
+    return token_data, user_id
+
+
+async def get_current_user(session: AsyncSessionDep, token: TokenDep) -> User:
+    _, user_id = await parse_token(session, token)
+    user = await load_user(session, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if not user.is_active:
@@ -49,9 +157,59 @@ def get_current_user(session: SessionDep, token: TokenDep) -> User:
 CurrentUser = Annotated[User, Depends(get_current_user)]
 
 
-def get_current_active_superuser(current_user: CurrentUser) -> User:
+@dataclass(frozen=True)
+class Principal:
+    """
+    Authorization state of the caller, without the rest of the user row.
+    """
+
+    id: uuid.UUID
+    is_superuser: bool
+
+
+async def get_current_principal(session: AsyncSessionDep, token: TokenDep) -> Principal:
+    token_data, user_id = await parse_token(session, token)
+    if (
+        settings.AUTH_CLAIMS_ONLY
+        and token_data.is_active is not None
+        and token_data.is_superuser is not None
+    ):
+        # Claims-only mode: trust the short-lived access token, no DB access
+        if not token_data.is_active:
+            raise HTTPException(status_code=400, detail="Inactive user")
+        return Principal(id=user_id, is_superuser=token_data.is_superuser)
+    user = await get_current_user(session, token)
+    return Principal(id=user.id, is_superuser=user.is_superuser)
+
+
+CurrentPrincipal = Annotated[Principal, Depends(get_current_principal)]
+
+
+def get_current_active_superuser(current_user: CurrentPrincipal) -> Principal:
     if not current_user.is_superuser:
         raise HTTPException(
             status_code=403, detail="The user doesn't have enough privileges"
         )
     return current_user
+
+
+def get_page(
+    skip: int = 0,
+    limit: int = 100,
+    cursor: str | None = None,
+    count: CountMode = "exact",
+) -> Page:
+    """
+    Listing parameters: pass the previous page's next_cursor as cursor to
+    page by key instead of skipping rows, and pick how the total is counted.
+    """
+    if not cursor:
+        return Page(skip=skip, limit=limit, count=count)
+    try:
+        after = decode_cursor(cursor)
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return Page(skip=skip, limit=limit, after=after, count=count)
+
+
+PageDep = Annotated[Page, Depends(get_page)]
@@ -1,52 +1,94 @@
 import uuid
-from typing import Any
+from typing import Annotated, Any, TypeVar
 
-from fastapi import APIRouter, HTTPException
-from sqlmodel import func, select
+from fastapi import APIRouter, Body, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter, ValidationError
+from sqlmodel import col, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import SelectOfScalar
 
-from app.api.deps import CurrentUser, SessionDep
-from app.models import Item, ItemCreate, ItemPublic, ItemsPublic, ItemUpdate, Message
+from app import crud
+from app.api.deps import AsyncSessionDep, CurrentPrincipal, PageDep, Principal
+from app.common import BatchOperationResult
+from app.core.config import settings
+from app.core.export import ExportFormat, export_response
+from app.core.pagination import fetch_page, fetch_ranked_page
+from app.core.search import search_items
+from app.models import (
+    Item,
+    ItemBatchUpdate,
+    ItemCreate,
+    ItemPublic,
+    ItemsPublic,
+    ItemUpdate,
+    Message,
+)
 
 router = APIRouter(prefix="/items", tags=["items"])
 
+T = TypeVar("T")
+
+
+def visible_items(current_user: Principal) -> SelectOfScalar[Item]:
+    statement = select(Item)
+    if not current_user.is_superuser:
+        statement = statement.where(Item.owner_id == current_user.id)
+    return statement
+
 
 @router.get("/", response_model=ItemsPublic)
-def read_items(
-    session: SessionDep, current_user: CurrentUser, skip: int = 0, limit: int = 100
+async def read_items(
+    session: AsyncSessionDep,
+    current_user: CurrentPrincipal,
+    page: PageDep,
+    search: str | None = Query(default=None, max_length=100),
 ) -> Any:
     """
-    Retrieve items.
+    Retrieve items, ranked by relevance to search when given.
     """
-
-    if current_user.is_superuser:
-        count_statement = select(func.count()).select_from(Item)
-        count = session.exec(count_statement).one()
-        statement = select(Item).offset(skip).limit(limit)
-        items = session.exec(statement).all()
+    statement = visible_items(current_user)
+    if search and search.strip():
+        if page.after is not None:
+            raise HTTPException(
+                status_code=400, detail="Search results are paged with skip"
+            )
+        statement, rank = search_items(statement, search)
+        result = await fetch_ranked_page(session, statement, rank, Item.id, page)
     else:
-        count_statement = (
-            select(func.count())
-            .select_from(Item)
-            .where(Item.owner_id == current_user.id)
-        )
-        count = session.exec(count_statement).one()
-        statement = (
-            select(Item)
-            .where(Item.owner_id == current_user.id)
-            .offset(skip)
-            .limit(limit)
-        )
-        items = session.exec(statement).all()
+        result = await fetch_page(session, statement, Item.id, page)
+    return ItemsPublic(
+        data=result.data,
+        count=result.count,
+        count_type=result.count_type,
+        next_cursor=result.next_cursor,
+    )
 
-    return ItemsPublic(data=items, count=count)
+
+@router.get("/export")
+async def export_items(
+    current_user: CurrentPrincipal, format: ExportFormat = "ndjson"
+) -> StreamingResponse:
+    """
+    Stream all items visible to the caller as NDJSON or CSV.
+    """
+    return export_response(
+        visible_items(current_user).order_by(col(Item.id)),
+        ItemPublic,
+        format,
+        filename="items",
+        principal_id=current_user.id,
+    )
 
 
 @router.get("/{id}", response_model=ItemPublic)
-def read_item(session: SessionDep, current_user: CurrentUser, id: uuid.UUID) -> Any:
+async def read_item(
+    session: AsyncSessionDep, current_user: CurrentPrincipal, id: uuid.UUID
+) -> Any:
     """
     Get item by ID.
     """
-    item = session.get(Item, id)
+    item = await session.get(Item, id)
     if not item:
         raise HTTPException(status_code=404, detail="Item not found")
     if not current_user.is_superuser and (item.owner_id != current_user.id):
@@ -55,55 +97,186 @@ def read_item(session: SessionDep, current_user: CurrentUser, id: uuid.UUID) ->
 
 
 @router.post("/", response_model=ItemPublic)
-def create_item(
-    *, session: SessionDep, current_user: CurrentUser, item_in: ItemCreate
+async def create_item(
+    *, session: AsyncSessionDep, current_user: CurrentPrincipal, item_in: ItemCreate
 ) -> Any:
     """
     Create new item.
     """
-    item = Item.model_validate(item_in, update={"owner_id": current_user.id})
-    session.add(item)
-    session.commit()
-    session.refresh(item)
-    return item
+    return await crud.create_item_async(
+        session=session, item_in=item_in, owner_id=current_user.id
+    )
+
+
+BatchBody = Annotated[list[Any], Body()]
+
+item_create_adapter = TypeAdapter(ItemCreate)
+item_batch_update_adapter = TypeAdapter(ItemBatchUpdate)
+item_id_adapter = TypeAdapter(uuid.UUID)
+
+
+def validate_batch(
+    rows: list[Any], adapter: TypeAdapter[T]
+) -> tuple[list[tuple[int, T]], list[dict[str, Any]]]:
+    """
+    Validate each entry on its own, so one bad entry doesn't fail the batch.
+    """
+    if len(rows) > settings.ITEMS_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.ITEMS_BATCH_MAX_SIZE} items per batch",
+        )
+    valid: list[tuple[int, T]] = []
+    failed: list[dict[str, Any]] = []
+    for index, row in enumerate(rows):
+        try:
+            valid.append((index, adapter.validate_python(row)))
+        except ValidationError as e:
+            error = "; ".join(
+                f"{'.'.join(map(str, err['loc'])) or 'item'}: {err['msg']}"
+                for err in e.errors()
+            )
+            failed.append({"index": index, "error": error})
+    return valid, failed
+
+
+async def check_owners(
+    session: AsyncSession, current_user: Principal, ids: list[tuple[int, uuid.UUID]]
+) -> tuple[set[int], list[dict[str, Any]]]:
+    """
+    Split entries into the indexes the caller may modify and failures.
+    """
+    owners = await crud.get_item_owners_async(
+        session=session, ids=list({item_id for _, item_id in ids})
+    )
+    allowed: set[int] = set()
+    failed: list[dict[str, Any]] = []
+    seen: set[uuid.UUID] = set()
+    for index, item_id in ids:
+        error = None
+        if item_id in seen:
+            error = "Duplicate item id"
+        elif item_id not in owners:
+            error = "Item not found"
+        elif not current_user.is_superuser and owners[item_id] != current_user.id:
+            error = "Not enough permissions"
+        seen.add(item_id)
+        if error:
+            failed.append({"index": index, "id": str(item_id), "error": error})
+        else:
+            allowed.add(index)
+    return allowed, failed
+
+
+def batch_result(total: int, failed: list[dict[str, Any]]) -> BatchOperationResult:
+    failed.sort(key=lambda failure: failure["index"])
+    return BatchOperationResult(
+        total=total,
+        success_count=total - len(failed),
+        failed_count=len(failed),
+        failed_items=failed or None,
+    )
+
+
+@router.post("/batch", response_model=BatchOperationResult)
+async def create_items(
+    session: AsyncSessionDep, current_user: CurrentPrincipal, items_in: BatchBody
+) -> Any:
+    """
+    Create many items in one transaction.
+    """
+    valid, failed = validate_batch(items_in, item_create_adapter)
+    await crud.create_items_async(
+        session=session,
+        items_in=[item_in for _, item_in in valid],
+        owner_id=current_user.id,
+    )
+    return batch_result(len(items_in), failed)
+
+
+@router.patch("/batch", response_model=BatchOperationResult)
+async def update_items(
+    session: AsyncSessionDep, current_user: CurrentPrincipal, items_in: BatchBody
+) -> Any:
+    """
+    Update many items in one transaction.
+    """
+    valid, failed = validate_batch(items_in, item_batch_update_adapter)
+    for index, item_in in list(valid):
+        if "title" in item_in.model_fields_set and item_in.title is None:
+            valid.remove((index, item_in))
+            failed.append({"index": index, "error": "title: cannot be null"})
+    allowed, denied = await check_owners(
+        session, current_user, [(index, item_in.id) for index, item_in in valid]
+    )
+    updates = {
+        item_in.id: item_in.model_dump(exclude_unset=True, exclude={"id"})
+        for index, item_in in valid
+        if index in allowed
+    }
+    await crud.update_items_async(session=session, updates=updates)
+    return batch_result(len(items_in), failed + denied)
+
+
+@router.delete("/batch", response_model=BatchOperationResult)
+async def delete_items(
+    session: AsyncSessionDep, current_user: CurrentPrincipal, ids: BatchBody
+) -> Any:
+    """
+    Delete many items in one transaction.
+    """
+    valid, failed = validate_batch(ids, item_id_adapter)
+    allowed, denied = await check_owners(session, current_user, valid)
+    await crud.delete_items_async(
+        session=session,
+        ids=[item_id for index, item_id in valid if index in allowed],
+    )
+    return batch_result(len(ids), failed + denied)
+
+
+async def write_failed(session: AsyncSession, id: uuid.UUID) -> HTTPException:
+    """
+    Error for an owner-filtered write that matched no item.
+    """
+    if (await session.exec(select(Item.id).where(Item.id == id))).first() is None:
+        return HTTPException(status_code=404, detail="Item not found")
+    return HTTPException(status_code=400, detail="Not enough permissions")
 
 
 @router.put("/{id}", response_model=ItemPublic)
-def update_item(
+async def update_item(
     *,
-    session: SessionDep,
-    current_user: CurrentUser,
+    session: AsyncSessionDep,
+    current_user: CurrentPrincipal,
     id: uuid.UUID,
     item_in: ItemUpdate,
 ) -> Any:
     """
     Update an item.
     """
-    item = session.get(Item, id)
+    item = await crud.update_item_async(
+        session=session,
+        item_id=id,
+        item_in=item_in,
+        owner_id=None if current_user.is_superuser else current_user.id,
+    )
     if not item:
-        raise HTTPException(status_code=404, detail="Item not found")
-    if not current_user.is_superuser and (item.owner_id != current_user.id):
-        raise HTTPException(status_code=400, detail="Not enough permissions")
-    update_dict = item_in.model_dump(exclude_unset=True)
-    item.sqlmodel_update(update_dict)
-    session.add(item)
-    session.commit()
-    session.refresh(item)
+        raise await write_failed(session, id)
     return item
 
 
 @router.delete("/{id}")
-def delete_item(
-    session: SessionDep, current_user: CurrentUser, id: uuid.UUID
+async def delete_item(
+    session: AsyncSessionDep, current_user: CurrentPrincipal, id: uuid.UUID
 ) -> Message:
     """
     Delete an item.
     """
-    item = session.get(Item, id)
-    if not item:
-        raise HTTPException(status_code=404, detail="Item not found")
-    if not current_user.is_superuser and (item.owner_id != current_user.id):
-        raise HTTPException(status_code=400, detail="Not enough permissions")
-    session.delete(item)
-    session.commit()
+    deleted = await crud.delete_item_async(
+        session=session,
+        item_id=id,
+        owner_id=None if current_user.is_superuser else current_user.id,
+    )
+    if not deleted:
+        raise await write_failed(session, id)
     return Message(message="Item deleted successfully")
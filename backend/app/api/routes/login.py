@@ -1,16 +1,27 @@
-from datetime import timedelta
+import ipaddress
+from datetime import datetime, timedelta, timezone
 from typing import Annotated, Any
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import HTMLResponse
 from fastapi.security import OAuth2PasswordRequestForm
 
 from app import crud
-from app.api.deps import CurrentUser, SessionDep, get_current_active_superuser
+from app.api.deps import (
+    AsyncSessionDep,
+    CurrentUser,
+    TokenDep,
+    get_current_active_superuser,
+    parse_token,
+)
 from app.core import security
+from app.core.cache import principal_cache
 from app.core.config import settings
-from app.core.security import get_password_hash
-from app.models import Message, NewPassword, Token, UserPublic
+from app.core.hashing import password_hasher
+from app.core.revocation import revocation_list
+from app.core.throttle import login_throttle
+from app.models import Message, NewPassword, Token, TokenRefresh, User, UserPublic
 from app.utils import (
     generate_password_reset_token,
     generate_reset_password_email,
@@ -21,30 +32,127 @@ from app.utils import (
 router = APIRouter(tags=["login"])
 
 
+def is_trusted_proxy(host: str) -> bool:
+    try:
+        address = ipaddress.ip_address(host)
+    except ValueError:
+        return False
+    return any(
+        address in ipaddress.ip_network(network, strict=False)
+        for network in settings.TRUSTED_PROXIES
+    )
+
+
+def client_ip(request: Request) -> str | None:
+    """
+    Client address for throttling. Behind a trusted proxy it's the nearest
+    untrusted X-Forwarded-For entry, None when only proxies are known.
+    """
+    if request.client is None:
+        return None
+    if not is_trusted_proxy(request.client.host):
+        return request.client.host
+    forwarded = ",".join(request.headers.getlist("X-Forwarded-For")).split(",")
+    for host in reversed([host.strip() for host in forwarded if host.strip()]):
+        if not is_trusted_proxy(host):
+            return host
+    return None
+
+
+def issue_tokens(user: User) -> Token:
+    if not settings.AUTH_CLAIMS_ONLY:
+        access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+        return Token(
+            access_token=security.create_access_token(
+                user.id, expires_delta=access_token_expires
+            )
+        )
+    access_token_expires = timedelta(
+        minutes=settings.CLAIMS_ACCESS_TOKEN_EXPIRE_MINUTES
+    )
+    refresh_token_expires = timedelta(minutes=settings.REFRESH_TOKEN_EXPIRE_MINUTES)
+    return Token(
+        access_token=security.create_access_token(
+            user.id,
+            expires_delta=access_token_expires,
+            claims={"is_active": user.is_active, "is_superuser": user.is_superuser},
+        ),
+        refresh_token=security.create_refresh_token(
+            user.id, expires_delta=refresh_token_expires
+        ),
+    )
+
+
 @router.post("/login/access-token")
-def login_access_token(
-    session: SessionDep, form_data: Annotated[OAuth2PasswordRequestForm, Depends()]
+async def login_access_token(
+    request: Request,
+    session: AsyncSessionDep,
+    form_data: Annotated[OAuth2PasswordRequestForm, Depends()],
 ) -> Token:
     """
     OAuth2 compatible token login, get an access token for future requests
     """
-    user = crud.authenticate(
+    throttle_keys = login_throttle.keys(
+        scope="login", account=form_data.username, ip=client_ip(request)
+    )
+    # Reject locked out callers before doing any hash work. The shared store
+    # may wait on a SQLite lock, so keep it off the event loop
+    await run_in_threadpool(login_throttle.check, throttle_keys)
+    user = await crud.authenticate_async(
         session=session, email=form_data.username, password=form_data.password
     )
     if not user:
+        await run_in_threadpool(login_throttle.record_failure, throttle_keys)
         raise HTTPException(status_code=400, detail="Incorrect email or password")
     elif not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
-    return Token(
-        access_token=security.create_access_token(
-            user.id, expires_delta=access_token_expires
+    # Only clear the account counter, one valid login must not reset the IP one
+    await run_in_threadpool(login_throttle.reset, throttle_keys[:1])
+    return issue_tokens(user)
+
+
+@router.post("/login/refresh-token")
+async def refresh_token(session: AsyncSessionDep, body: TokenRefresh) -> Token:
+    """
+    Exchange a refresh token for a new access token
+    """
+    _, user_id = await parse_token(session, body.refresh_token, token_type="refresh")
+    user = await session.get(User, user_id)
+    if not user:
+        raise HTTPException(status_code=404, detail="User not found")
+    if not user.is_active:
+        raise HTTPException(status_code=400, detail="Inactive user")
+    return issue_tokens(user)
+
+
+@router.post("/login/logout")
+async def logout(
+    session: AsyncSessionDep, token: TokenDep, body: TokenRefresh | None = None
+) -> Message:
+    """
+    Revoke the current access token, and the given refresh token if any
+    """
+    token_data, _ = await parse_token(session, token)
+    revoked = [token_data]
+    if body:
+        refresh_data, _ = await parse_token(
+            session, body.refresh_token, token_type="refresh"
         )
-    )
+        revoked.append(refresh_data)
+    for data in revoked:
+        if not data.jti or not data.exp:
+            raise HTTPException(status_code=400, detail="Token cannot be revoked")
+    for data in revoked:
+        await revocation_list.revoke(
+            session,
+            str(data.jti),
+            datetime.fromtimestamp(data.exp or 0, tz=timezone.utc),
+        )
+    return Message(message="Logged out successfully")
 
 
 @router.post("/login/test-token", response_model=UserPublic)
-def test_token(current_user: CurrentUser) -> Any:
+async def test_token(current_user: CurrentUser) -> Any:
     """
     Test access token
     """
@@ -52,13 +160,20 @@ def test_token(current_user: CurrentUser) -> Any:
 
 
 @router.post("/password-recovery/{email}")
-def recover_password(email: str, session: SessionDep) -> Message:
+async def recover_password(
+    request: Request, email: str, session: AsyncSessionDep
+) -> Message:
     """
     Password Recovery
     """
-    user = crud.get_user_by_email(session=session, email=email)
+    throttle_keys = login_throttle.keys(
+        scope="recovery", account=email, ip=client_ip(request)
+    )
+    await run_in_threadpool(login_throttle.check, throttle_keys)
+    user = await crud.get_user_by_email_async(session=session, email=email)
 
     if not user:
+        await run_in_threadpool(login_throttle.record_failure, throttle_keys)
         raise HTTPException(
             status_code=404,
             detail="The user with this email does not exist in the system.",
@@ -67,7 +182,8 @@ def recover_password(email: str, session: SessionDep) -> Message:
     email_data = generate_reset_password_email(
         email_to=user.email, email=email, token=password_reset_token
     )
-    send_email(
+    await run_in_threadpool(
+        send_email,
         email_to=user.email,
         subject=email_data.subject,
         html_content=email_data.html_content,
@@ -76,14 +192,14 @@ def recover_password(email: str, session: SessionDep) -> Message:
 
 
 @router.post("/reset-password/")
-def reset_password(session: SessionDep, body: NewPassword) -> Message:
+async def reset_password(session: AsyncSessionDep, body: NewPassword) -> Message:
     """
     Reset password
     """
     email = verify_password_reset_token(token=body.token)
     if not email:
         raise HTTPException(status_code=400, detail="Invalid token")
-    user = crud.get_user_by_email(session=session, email=email)
+    user = await crud.get_user_by_email_async(session=session, email=email)
     if not user:
         raise HTTPException(
             status_code=404,
@@ -91,10 +207,11 @@ def reset_password(session: SessionDep, body: NewPassword) -> Message:
         )
     elif not user.is_active:
         raise HTTPException(status_code=400, detail="Inactive user")
-    hashed_password = get_password_hash(password=body.new_password)
+    hashed_password = await password_hasher.hash(body.new_password)
     user.hashed_password = hashed_password
     session.add(user)
-    session.commit()
+    await session.commit()
+    principal_cache.invalidate(user.id)
     return Message(message="Password updated successfully")
 
 
@@ -103,11 +220,11 @@ def reset_password(session: SessionDep, body: NewPassword) -> Message:
     dependencies=[Depends(get_current_active_superuser)],
     response_class=HTMLResponse,
 )
-def recover_password_html_content(email: str, session: SessionDep) -> Any:
+async def recover_password_html_content(email: str, session: AsyncSessionDep) -> Any:
     """
     HTML Content for Password Recovery
     """
-    user = crud.get_user_by_email(session=session, email=email)
+    user = await crud.get_user_by_email_async(session=session, email=email)
 
     if not user:
         raise HTTPException(
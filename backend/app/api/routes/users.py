@@ -1,19 +1,29 @@
 import uuid
-from typing import Any
+from dataclasses import asdict
+from typing import Annotated, Any
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlmodel import col, delete, func, select
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from sqlmodel import col, select
 
 from app import crud
 from app.api.deps import (
+    AsyncSessionDep,
     CurrentUser,
-    SessionDep,
+    PageDep,
+    Principal,
     get_current_active_superuser,
 )
+from app.common import BatchOperationResult
+from app.core import user_import
+from app.core.cache import principal_cache
 from app.core.config import settings
-from app.core.security import get_password_hash, verify_password
+from app.core.export import ExportFormat, export_response
+from app.core.hashing import password_hasher
+from app.core.pagination import fetch_page
+from app.core.user_deletion import DeletionJob, user_deletions
 from app.models import (
-    Item,
     Message,
     UpdatePassword,
     User,
@@ -34,40 +44,57 @@ router = APIRouter(prefix="/users", tags=["users"])
     dependencies=[Depends(get_current_active_superuser)],
     response_model=UsersPublic,
 )
-def read_users(session: SessionDep, skip: int = 0, limit: int = 100) -> Any:
+async def read_users(session: AsyncSessionDep, page: PageDep) -> Any:
     """
     Retrieve users.
     """
 
-    count_statement = select(func.count()).select_from(User)
-    count = session.exec(count_statement).one()
+    statement = select(User)
+    result = await fetch_page(session, statement, User.id, page)
+    return UsersPublic(
+        data=result.data,
+        count=result.count,
+        count_type=result.count_type,
+        next_cursor=result.next_cursor,
+    )
 
-    statement = select(User).offset(skip).limit(limit)
-    users = session.exec(statement).all()
 
-    return UsersPublic(data=users, count=count)
+@router.get("/export")
+async def export_users(
+    current_user: Annotated[Principal, Depends(get_current_active_superuser)],
+    format: ExportFormat = "ndjson",
+) -> StreamingResponse:
+    """
+    Stream all users as NDJSON or CSV.
+    """
+    return export_response(
+        select(User).order_by(col(User.id)),
+        UserPublic,
+        format,
+        filename="users",
+        principal_id=current_user.id,
+    )
 
 
 @router.post(
     "/", dependencies=[Depends(get_current_active_superuser)], response_model=UserPublic
 )
-def create_user(*, session: SessionDep, user_in: UserCreate) -> Any:
+async def create_user(*, session: AsyncSessionDep, user_in: UserCreate) -> Any:
     """
     Create new user.
     """
-    user = crud.get_user_by_email(session=session, email=user_in.email)
-    if user:
+    user = await crud.create_user_async(session=session, user_create=user_in)
+    if not user:
         raise HTTPException(
             status_code=400,
             detail="The user with this email already exists in the system.",
         )
-
-    user = crud.create_user(session=session, user_create=user_in)
     if settings.emails_enabled and user_in.email:
         email_data = generate_new_account_email(
             email_to=user_in.email, username=user_in.email, password=user_in.password
         )
-        send_email(
+        await run_in_threadpool(
+            send_email,
             email_to=user_in.email,
             subject=email_data.subject,
             html_content=email_data.html_content,
@@ -75,94 +102,135 @@ def create_user(*, session: SessionDep, user_in: UserCreate) -> Any:
     return user
 
 
+@router.post(
+    "/import",
+    dependencies=[Depends(get_current_active_superuser)],
+    response_model=BatchOperationResult,
+    openapi_extra={
+        "requestBody": {
+            "required": True,
+            "content": {
+                "text/csv": {"schema": {"type": "string"}},
+                "application/x-ndjson": {"schema": {"type": "string"}},
+            },
+        }
+    },
+)
+async def import_users(request: Request, session: AsyncSessionDep) -> Any:
+    """
+    Bulk create users from a streamed CSV (with a header row) or NDJSON upload.
+    """
+    fmt = user_import.import_format(request.headers.get("content-type", ""))
+    if fmt is None:
+        raise HTTPException(
+            status_code=415, detail="Upload must be text/csv or application/x-ndjson"
+        )
+    records = user_import.iter_records(user_import.iter_lines(request.stream()), fmt)
+    return await user_import.import_users(session, records)
+
+
 @router.patch("/me", response_model=UserPublic)
-def update_user_me(
-    *, session: SessionDep, user_in: UserUpdateMe, current_user: CurrentUser
+async def update_user_me(
+    *, session: AsyncSessionDep, user_in: UserUpdateMe, current_user: CurrentUser
 ) -> Any:
     """
     Update own user.
     """
-
-    if user_in.email:
-        existing_user = crud.get_user_by_email(session=session, email=user_in.email)
-        if existing_user and existing_user.id != current_user.id:
-            raise HTTPException(
-                status_code=409, detail="User with this email already exists"
-            )
-    user_data = user_in.model_dump(exclude_unset=True)
-    current_user.sqlmodel_update(user_data)
-    session.add(current_user)
-    session.commit()
-    session.refresh(current_user)
-    return current_user
+    user = await crud.update_user_async(
+        session=session, db_user=current_user, user_in=user_in
+    )
+    if not user:
+        raise HTTPException(
+            status_code=409, detail="User with this email already exists"
+        )
+    return user
 
 
 @router.patch("/me/password", response_model=Message)
-def update_password_me(
-    *, session: SessionDep, body: UpdatePassword, current_user: CurrentUser
+async def update_password_me(
+    *, session: AsyncSessionDep, body: UpdatePassword, current_user: CurrentUser
 ) -> Any:
     """
     Update own password.
     """
-    if not verify_password(body.current_password, current_user.hashed_password):
+    if not await password_hasher.verify(
+        body.current_password, current_user.hashed_password
+    ):
         raise HTTPException(status_code=400, detail="Incorrect password")
     if body.current_password == body.new_password:
         raise HTTPException(
             status_code=400, detail="New password cannot be the same as the current one"
         )
-    hashed_password = get_password_hash(body.new_password)
+    hashed_password = await password_hasher.hash(body.new_password)
     current_user.hashed_password = hashed_password
     session.add(current_user)
-    session.commit()
+    await session.commit()
+    principal_cache.invalidate(current_user.id)
     return Message(message="Password updated successfully")
 
 
 @router.get("/me", response_model=UserPublic)
-def read_user_me(current_user: CurrentUser) -> Any:
+async def read_user_me(current_user: CurrentUser) -> Any:
     """
     Get current user.
     """
     return current_user
 
 
+def deletion_message(
+    job: DeletionJob, response: Response, *, location: bool = True
+) -> Message:
+    if job.status == "completed":
+        return Message(message="User deleted successfully")
+    # The user is deactivated, their items are still being deleted
+    response.status_code = 202
+    if location:
+        response.headers["Location"] = f"{settings.API_V1_STR}/users/deletions/{job.id}"
+    return Message(message="User deactivated, deletion in progress")
+
+
 @router.delete("/me", response_model=Message)
-def delete_user_me(session: SessionDep, current_user: CurrentUser) -> Any:
+async def delete_user_me(
+    session: AsyncSessionDep, current_user: CurrentUser, response: Response
+) -> Any:
     """
     Delete own user.
+
+    Users with many items get a 202 while the items are deleted in the
+    background. There is no Location: the job is only readable by superusers,
+    and the deactivated user can no longer authenticate.
     """
     if current_user.is_superuser:
         raise HTTPException(
             status_code=403, detail="Super users are not allowed to delete themselves"
         )
-    session.delete(current_user)
-    session.commit()
-    return Message(message="User deleted successfully")
+    job = await user_deletions.delete_user(session, current_user.id)
+    return deletion_message(job, response, location=False)
 
 
 @router.post("/signup", response_model=UserPublic)
-def register_user(session: SessionDep, user_in: UserRegister) -> Any:
+async def register_user(session: AsyncSessionDep, user_in: UserRegister) -> Any:
     """
     Create new user without the need to be logged in.
     """
-    user = crud.get_user_by_email(session=session, email=user_in.email)
-    if user:
+    user_create = UserCreate.model_validate(user_in)
+    user = await crud.create_user_async(session=session, user_create=user_create)
+    if not user:
         raise HTTPException(
             status_code=400,
             detail="The user with this email already exists in the system",
         )
-    user_create = UserCreate.model_validate(user_in)
-    user = crud.create_user(session=session, user_create=user_create)
     return user
 
 
 @router.get("/{user_id}", response_model=UserPublic)
-def read_user_by_id(
-    user_id: uuid.UUID, session: SessionDep, current_user: CurrentUser
+async def read_user_by_id(
+    user_id: uuid.UUID, session: AsyncSessionDep, current_user: CurrentUser
 ) -> Any:
     """
     Get a specific user by id.
     """
-    user = session.get(User, user_id)
+    user = await session.get(User, user_id)
     if user == current_user:
         return user
     if not current_user.is_superuser:
@@ -178,9 +246,9 @@ def read_user_by_id(
     dependencies=[Depends(get_current_active_superuser)],
     response_model=UserPublic,
 )
-def update_user(
+async def update_user(
     *,
-    session: SessionDep,
+    session: AsyncSessionDep,
     user_id: uuid.UUID,
     user_in: UserUpdate,
 ) -> Any:
@@ -188,39 +256,56 @@ def update_user(
     Update a user.
     """
 
-    db_user = session.get(User, user_id)
+    db_user = await session.get(User, user_id)
     if not db_user:
         raise HTTPException(
             status_code=404,
             detail="The user with this id does not exist in the system",
         )
-    if user_in.email:
-        existing_user = crud.get_user_by_email(session=session, email=user_in.email)
-        if existing_user and existing_user.id != user_id:
-            raise HTTPException(
-                status_code=409, detail="User with this email already exists"
-            )
-
-    db_user = crud.update_user(session=session, db_user=db_user, user_in=user_in)
+    db_user = await crud.update_user_async(
+        session=session, db_user=db_user, user_in=user_in
+    )
+    if not db_user:
+        raise HTTPException(
+            status_code=409, detail="User with this email already exists"
+        )
     return db_user
 
 
+@router.get("/deletions/{job_id}", dependencies=[Depends(get_current_active_superuser)])
+async def read_user_deletion(job_id: uuid.UUID) -> dict[str, Any]:
+    """
+    Progress of a user deletion started on this worker.
+
+    Jobs are kept in the memory of the worker process that started them, so
+    with several workers this returns 404 when the request lands on another
+    worker, or after a restart.
+    """
+    job = user_deletions.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Deletion job not found")
+    return asdict(job)
+
+
 @router.delete("/{user_id}", dependencies=[Depends(get_current_active_superuser)])
-def delete_user(
-    session: SessionDep, current_user: CurrentUser, user_id: uuid.UUID
+async def delete_user(
+    session: AsyncSessionDep,
+    current_user: CurrentUser,
+    user_id: uuid.UUID,
+    response: Response,
 ) -> Message:
     """
     Delete a user.
+
+    Users with many items get a 202 whose Location points at the deletion job.
+    The job is tracked only by the worker that runs it, see read_user_deletion.
     """
-    user = session.get(User, user_id)
+    user = await session.get(User, user_id)
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     if user == current_user:
         raise HTTPException(
             status_code=403, detail="Super users are not allowed to delete themselves"
         )
-    statement = delete(Item).where(col(Item.owner_id) == user_id)
-    session.exec(statement)  # type: ignore
-    session.delete(user)
-    session.commit()
-    return Message(message="User deleted successfully")
+    job = await user_deletions.delete_user(session, user_id)
+    return deletion_message(job, response)
@@ -1,7 +1,15 @@
-from fastapi import APIRouter, Depends
+from dataclasses import asdict
+from typing import Any
+
+from fastapi import APIRouter, Depends, Query
 from pydantic.networks import EmailStr
 
 from app.api.deps import get_current_active_superuser
+from app.core.cache import principal_cache, token_cache
+from app.core.db import async_engine, async_replica_engines, engine
+from app.core.hashing import password_hasher
+from app.core.pool import pool_stats
+from app.core.slow_queries import SortKey, slow_query_log
 from app.models import Message
 from app.utils import generate_test_email, send_email
 
@@ -29,3 +37,34 @@ def test_email(email_to: EmailStr) -> Message:
 @router.get("/health-check/")
 async def health_check() -> bool:
     return True
+
+
+@router.get("/metrics/", dependencies=[Depends(get_current_active_superuser)])
+def read_metrics() -> dict[str, Any]:
+    """
+    Runtime metrics of in-process components.
+    """
+    db_pool = pool_stats(engine)
+    async_db_pool = pool_stats(async_engine)
+    return {
+        "db_pool": asdict(db_pool) if db_pool else None,
+        "async_db_pool": asdict(async_db_pool) if async_db_pool else None,
+        "async_replica_pools": [
+            asdict(stats)
+            for stats in map(pool_stats, async_replica_engines)
+            if stats is not None
+        ],
+        "password_hasher": asdict(password_hasher.stats()),
+        "principal_cache": asdict(principal_cache.stats()),
+        "token_cache": asdict(token_cache.stats()),
+    }
+
+
+@router.get("/slow-queries/", dependencies=[Depends(get_current_active_superuser)])
+def read_slow_queries(
+    limit: int = Query(default=20, ge=1, le=100), sort: SortKey = "total"
+) -> list[dict[str, Any]]:
+    """
+    Slowest statements of this worker process, by total or max duration.
+    """
+    return [asdict(statement) for statement in slow_query_log.top(limit, sort)]
@@ -0,0 +1,16 @@
+from typing import Any
+
+from fastapi import APIRouter, Response
+
+from app.core.jwt_keys import get_key_ring
+
+router = APIRouter(prefix="/.well-known", tags=["well-known"])
+
+
+@router.get("/jwks.json")
+def jwks(response: Response) -> dict[str, Any]:
+    """
+    Public keys for verifying access tokens locally.
+    """
+    response.headers["Cache-Control"] = "public, max-age=300"
+    return get_key_ring().jwks()
@@ -0,0 +1,95 @@
+import argparse
+import logging
+import time
+
+from passlib.context import CryptContext
+
+from app.core.security import build_pwd_context
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+BCRYPT_MIN_ROUNDS = 4
+BCRYPT_MAX_ROUNDS = 31
+ARGON2_MAX_TIME_COST = 64
+SAMPLE_PASSWORD = "calibration-password"
+
+
+def measure_verify_ms(context: CryptContext, samples: int) -> float:
+    hashed = context.hash(SAMPLE_PASSWORD)
+    timings = []
+    for _ in range(samples):
+        start = time.perf_counter()
+        context.verify(SAMPLE_PASSWORD, hashed)
+        timings.append(time.perf_counter() - start)
+    return sorted(timings)[len(timings) // 2] * 1000
+
+
+def calibrate_bcrypt(target_ms: float, samples: int) -> tuple[int, float]:
+    # Each extra round doubles the cost, pick the highest one within target
+    best_rounds = BCRYPT_MIN_ROUNDS
+    best_ms = measure_verify_ms(build_pwd_context("bcrypt", best_rounds), samples)
+    for rounds in range(BCRYPT_MIN_ROUNDS + 1, BCRYPT_MAX_ROUNDS + 1):
+        elapsed = measure_verify_ms(build_pwd_context("bcrypt", rounds), samples)
+        logger.info(f"bcrypt rounds={rounds}: {elapsed:.1f} ms")
+        if elapsed > target_ms:
+            break
+        best_rounds, best_ms = rounds, elapsed
+    return best_rounds, best_ms
+
+
+def calibrate_argon2(
+    target_ms: float, samples: int, memory_cost: int
+) -> tuple[int, float]:
+    # Memory cost is fixed by configuration, scale the time cost
+    best_time_cost = 1
+    best_ms = measure_verify_ms(
+        build_pwd_context("argon2", argon2_time_cost=1, argon2_memory_cost=memory_cost),
+        samples,
+    )
+    for time_cost in range(2, ARGON2_MAX_TIME_COST + 1):
+        context = build_pwd_context(
+            "argon2", argon2_time_cost=time_cost, argon2_memory_cost=memory_cost
+        )
+        elapsed = measure_verify_ms(context, samples)
+        logger.info(f"argon2 time_cost={time_cost}: {elapsed:.1f} ms")
+        if elapsed > target_ms:
+            break
+        best_time_cost, best_ms = time_cost, elapsed
+    return best_time_cost, best_ms
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Benchmark this machine and pick password hashing parameters"
+    )
+    parser.add_argument(
+        "--target-ms", type=float, default=250, help="Target verify time per login"
+    )
+    parser.add_argument("--scheme", choices=["bcrypt", "argon2"], default="bcrypt")
+    parser.add_argument("--samples", type=int, default=5)
+    parser.add_argument(
+        "--argon2-memory-cost", type=int, default=64 * 1024, help="In KiB"
+    )
+    args = parser.parse_args()
+
+    logger.info(f"Calibrating {args.scheme} for ~{args.target_ms:.0f} ms per verify")
+    if args.scheme == "bcrypt":
+        rounds, elapsed = calibrate_bcrypt(args.target_ms, args.samples)
+        logger.info(
+            f"Recommended: PASSWORD_HASH_SCHEME=bcrypt BCRYPT_ROUNDS={rounds} "
+            f"({elapsed:.1f} ms per verify)"
+        )
+    else:
+        time_cost, elapsed = calibrate_argon2(
+            args.target_ms, args.samples, args.argon2_memory_cost
+        )
+        logger.info(
+            f"Recommended: PASSWORD_HASH_SCHEME=argon2 ARGON2_TIME_COST={time_cost} "
+            f"ARGON2_MEMORY_COST={args.argon2_memory_cost} "
+            f"({elapsed:.1f} ms per verify)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -247,15 +247,20 @@ class SystemException(AppException):
 
 
 class DatabaseException(SystemException):
-    """数据库异常"""
+    """
+    数据库异常
+
+    默认为 DATABASE_ERROR (500); 查询超时等暂时性错误使用 SERVICE_UNAVAILABLE (503)
+    """
 
     def __init__(
         self,
         message: str | None = None,
         detail: str | None = None,
+        code: BusinessCode = BusinessCode.DATABASE_ERROR,
     ) -> None:
         super().__init__(
-            code=BusinessCode.DATABASE_ERROR,
+            code=code,
             message=message or "数据库操作失败",
             detail=detail,
         )
@@ -17,6 +17,7 @@ from .exceptions import (
     BUSINESS_CODE_MESSAGES,
     AppException,
     BusinessCode,
+    RateLimitException,
 )
 from .responses import error_response, get_request_id
 
@@ -32,6 +33,10 @@ async def app_exception_handler(request: Request, exc: AppException) -> JSONResp
         f"path={request.url.path}, request_id={get_request_id(request)}"
     )
 
+    headers = None
+    if isinstance(exc, RateLimitException):
+        headers = {"Retry-After": str(exc.retry_after)}
+
     return JSONResponse(
         status_code=exc.http_status,
         content=error_response(
@@ -41,6 +46,7 @@ async def app_exception_handler(request: Request, exc: AppException) -> JSONResp
             errors=exc.data.get("errors") if exc.data else None,
             request=request,
         ),
+        headers=headers,
     )
 
 
@@ -39,6 +39,7 @@ class PaginationMeta(BaseModel):
     total_pages: int = Field(ge=0, description="总页数")
     has_next: bool = Field(description="是否有下一页")
     has_prev: bool = Field(description="是否有上一页")
+    next_cursor: str | None = Field(default=None, description="下一页游标")
 
 
 class PaginatedData(BaseModel, Generic[T]):
@@ -128,6 +129,7 @@ def paginated_response(
     page_size: int,
     message: str = "操作成功",
     request: Request | None = None,
+    next_cursor: str | None = None,
 ) -> dict[str, Any]:
     """
     创建分页响应
@@ -139,6 +141,7 @@ def paginated_response(
         page_size: 每页数量
         message: 响应消息
         request: FastAPI 请求对象
+        next_cursor: 游标分页时下一页的游标
 
     Returns:
         分页响应字典
@@ -155,8 +158,9 @@ def paginated_response(
                 "page_size": page_size,
                 "total": total,
                 "total_pages": total_pages,
-                "has_next": page < total_pages,
+                "has_next": page < total_pages or next_cursor is not None,
                 "has_prev": page > 1,
+                "next_cursor": next_cursor,
             },
         },
         "timestamp": datetime.now(timezone.utc).isoformat(),
@@ -1,8 +1,10 @@
+import ipaddress
 import secrets
 import warnings
 from typing import Annotated, Any, Literal
 
 from pydantic import (
+    AfterValidator,
     AnyUrl,
     BeforeValidator,
     EmailStr,
@@ -23,6 +25,14 @@ def parse_cors(v: Any) -> list[str] | str:
     raise ValueError(v)
 
 
+def check_networks(v: list[str] | str) -> list[str]:
+    if isinstance(v, str):
+        raise ValueError(v)
+    for network in v:
+        ipaddress.ip_network(network, strict=False)
+    return v
+
+
 class Settings(BaseSettings):
     model_config = SettingsConfigDict(
         # Use top level .env file (one level above ./backend/)
@@ -32,8 +42,22 @@ class Settings(BaseSettings):
     )
     API_V1_STR: str = "/api/v1"
     SECRET_KEY: str = secrets.token_urlsafe(32)
+    # Directory of PEM keys (RSA or Ed25519) named <kid>.pem to sign JWTs with
+    # RS256/EdDSA and publish them at /.well-known/jwks.json. Public-only keys
+    # are used for verification only, e.g. a retired key during rotation.
+    # Unset: tokens are signed with HS256 and SECRET_KEY.
+    JWT_KEYS_DIR: str | None = None
+    # Key that signs new tokens, defaults to the last private key by name
+    JWT_ACTIVE_KEY_ID: str | None = None
     # 60 minutes * 24 hours * 8 days = 8 days
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    # Claims-only auth: short-lived access tokens carry is_active/is_superuser
+    # so authorization needs no DB access, refresh tokens are used to renew them
+    AUTH_CLAIMS_ONLY: bool = False
+    CLAIMS_ACCESS_TOKEN_EXPIRE_MINUTES: int = 15
+    REFRESH_TOKEN_EXPIRE_MINUTES: int = 60 * 24 * 8
+    # How often each worker syncs its in-memory copy of revoked token ids
+    TOKEN_REVOCATION_REFRESH_SECONDS: float = 5
     FRONTEND_HOST: str = "http://localhost:5173"
     ENVIRONMENT: Literal["local", "staging", "production"] = "local"
 
@@ -68,6 +92,102 @@ class Settings(BaseSettings):
             path=self.POSTGRES_DB,
         )
 
+    # Optional read replicas as "host" or "host:port" (comma separated or a
+    # JSON list), using the same credentials and database as the primary.
+    # Read-only GET requests on the async session are served by a replica.
+    POSTGRES_REPLICA_SERVERS: Annotated[
+        list[str] | str, BeforeValidator(parse_cors)
+    ] = []
+
+    @computed_field  # type: ignore[prop-decorator]
+    @property
+    def SQLALCHEMY_REPLICA_URIS(self) -> list[PostgresDsn]:
+        uris = []
+        for server in self.POSTGRES_REPLICA_SERVERS:
+            host, _, port = server.partition(":")
+            uris.append(
+                PostgresDsn.build(
+                    scheme="postgresql+psycopg",
+                    username=self.POSTGRES_USER,
+                    password=self.POSTGRES_PASSWORD,
+                    host=host,
+                    port=int(port) if port else self.POSTGRES_PORT,
+                    path=self.POSTGRES_DB,
+                )
+            )
+        return uris
+
+    # After a write, the user's reads stay on the primary for this long so
+    # they see their own changes despite replication lag
+    DB_REPLICA_STICKY_SECONDS: float = 5
+    # Shared file that records those writes, defaults to a SQLite file in /dev/shm
+    DB_REPLICA_STICKY_STORE_PATH: str | None = None
+
+    # Max entries per call of the /items/batch endpoints
+    ITEMS_BATCH_MAX_SIZE: int = 10_000
+    # Rows per transaction of the user bulk import, see app.core.user_import
+    USER_IMPORT_CHUNK_SIZE: int = 1000
+
+    # How listings fetch a page together with its exact total count:
+    # "pipeline" sends the count and page queries in one round trip with psycopg
+    # pipeline mode (falling back to "separate" when libpq lacks it), "separate"
+    # runs them one after the other, "window" adds count(*) OVER () to the page
+    # query. The window has to see every matching row before the cursor applies,
+    # so with "window" each page costs as much as the whole listing
+    LIST_QUERY_MODE: Literal["window", "pipeline", "separate"] = "pipeline"
+
+    # Items deleted per transaction when deleting a user, see app.core.user_deletion
+    USER_DELETE_BATCH_SIZE: int = 5000
+
+    # Rows fetched per round trip from the server-side cursor of the exports
+    EXPORT_BATCH_SIZE: int = 1000
+
+    # count=estimate on listings falls back to an exact count when the
+    # planner estimates fewer rows than this, as counting them is cheap
+    COUNT_ESTIMATE_EXACT_BELOW: int = 1000
+
+    # Connection pools of each worker process, see app.core.pool. The sync and
+    # the async engine each get a pool, so with N workers Postgres needs up to
+    # 2 * N * (DB_POOL_SIZE + DB_MAX_OVERFLOW) connections.
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    # Seconds to wait for a free connection before failing the request
+    DB_POOL_TIMEOUT_SECONDS: float = 30
+    # Replace connections older than this, -1 disables
+    DB_POOL_RECYCLE_SECONDS: int = 30 * 60
+    DB_POOL_PRE_PING: bool = True
+    # Connections opened at startup, capped at DB_POOL_SIZE
+    DB_POOL_MIN_SIZE: int = 0
+    # Add X-DB-Queries (statement count) and X-DB-Time (milliseconds) headers
+    # to responses, see app.core.query_counter
+    DB_QUERY_HEADERS: bool = False
+    # Log a warning when a request runs the same statement this many times,
+    # usually an N+1 query. 0 disables
+    DB_N_PLUS_ONE_THRESHOLD: int = 10
+    # Statements slower than this many milliseconds are logged and listed at
+    # /utils/slow-queries/, see app.core.slow_queries. 0 disables
+    DB_SLOW_QUERY_MS: float = 500
+    # Capture the EXPLAIN plan of each slow statement, in a background thread
+    DB_SLOW_QUERY_EXPLAIN: bool = True
+    # Distinct slow statements kept in memory, the ones with the least total
+    # time are dropped first
+    DB_SLOW_QUERY_MAX_STATEMENTS: int = 200
+    # Default statement_timeout of every connection in milliseconds, 0 disables.
+    # Set on connect through the libpq "options" parameter, which pgbouncer
+    # rejects: behind it use 0 here and set the timeout on the database role
+    DB_STATEMENT_TIMEOUT_MS: int = 30_000
+    # Per-route statement timeouts in milliseconds, keyed by operation id
+    # (tag-function name). Requests may lower them further with the
+    # X-Request-Deadline header, see app.core.timeouts
+    DB_ROUTE_STATEMENT_TIMEOUTS_MS: dict[str, int] = {
+        "items-read_items": 5000,
+        "users-read_users": 5000,
+    }
+    # psycopg prepares a query server-side once it ran this many times on a
+    # connection, 0 prepares every query and None disables prepared
+    # statements (required behind pgbouncer in transaction pooling mode)
+    DB_PREPARE_THRESHOLD: int | None = 5
+
     SMTP_TLS: bool = True
     SMTP_SSL: bool = False
     SMTP_PORT: int = 587
@@ -94,6 +214,51 @@ class Settings(BaseSettings):
     FIRST_SUPERUSER: EmailStr
     FIRST_SUPERUSER_PASSWORD: str
 
+    # Password hashing cost, pick values with `python -m app.calibrate_password_hash`.
+    # Stored hashes with other parameters are rehashed on the next login.
+    # argon2 needs the optional argon2 extra (argon2-cffi).
+    PASSWORD_HASH_SCHEME: Literal["bcrypt", "argon2"] = "bcrypt"
+    BCRYPT_ROUNDS: int = 12
+    ARGON2_TIME_COST: int = 3
+    # In KiB
+    ARGON2_MEMORY_COST: int = 64 * 1024
+
+    # Brute-force protection for login and password recovery, see
+    # app.core.throttle. Failures are counted per account and per IP in a
+    # sliding window; each lockout doubles up to the max.
+    LOGIN_THROTTLE_ENABLED: bool = True
+    LOGIN_THROTTLE_WINDOW_SECONDS: int = 300
+    LOGIN_THROTTLE_ACCOUNT_MAX_FAILURES: int = 5
+    LOGIN_THROTTLE_IP_MAX_FAILURES: int = 20
+    LOGIN_THROTTLE_LOCKOUT_SECONDS: int = 30
+    LOGIN_THROTTLE_MAX_LOCKOUT_SECONDS: int = 60 * 60
+    # Shared counter file, defaults to a SQLite file in /dev/shm
+    LOGIN_THROTTLE_STORE_PATH: str | None = None
+    # Reverse proxies in front of the app, such as Traefik, as IPs or CIDR
+    # networks (comma separated or a JSON list). A request from one of them
+    # is attributed to the nearest untrusted X-Forwarded-For address, so the
+    # per-IP throttle counts real clients and not the proxy. When the proxy
+    # sends no usable header, the IP counter is skipped.
+    # Setting uvicorn's FORWARDED_ALLOW_IPS env var to the proxy addresses
+    # instead makes request.client the real client already; either works.
+    TRUSTED_PROXIES: Annotated[
+        list[str] | str, BeforeValidator(parse_cors), AfterValidator(check_networks)
+    ] = []
+
+    # Dedicated process pool for bcrypt hashing, see app.core.hashing
+    PASSWORD_HASH_WORKERS: int = 2
+    # Max in-flight hash/verify calls before new ones are rejected with 503
+    PASSWORD_HASH_QUEUE_SIZE: int = 64
+
+    # In-process cache of authenticated users, keyed by user id.
+    # Each worker keeps its own copy, so keep the TTL short.
+    PRINCIPAL_CACHE_SIZE: int = 10_000
+    PRINCIPAL_CACHE_TTL_SECONDS: float = 30
+    # Cache of already verified JWTs, keyed by token digest. Entries never
+    # outlive the token's own exp claim.
+    TOKEN_CACHE_SIZE: int = 10_000
+    TOKEN_CACHE_TTL_SECONDS: float = 300
+
     def _check_default_secret(self, var_name: str, value: str | None) -> None:
         if value == "changethis":
             message = (
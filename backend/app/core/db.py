@@ -1,10 +1,84 @@
-from sqlmodel import Session, create_engine, select
+import random
+from typing import Any
+
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlmodel import Session, create_engine
+from sqlmodel.ext.asyncio.session import AsyncSession
 
 from app import crud
 from app.core.config import settings
-from app.models import User, UserCreate
+from app.core.pool import MonitoredAsyncQueuePool, MonitoredQueuePool
+from app.core.query_counter import instrument
+from app.core.replica import RoutingSession
+from app.core.slow_queries import slow_query_log
+from app.models import UserCreate
+
+# Passed to psycopg.connect, hot queries such as the listings become
+# server-side prepared statements
+connect_args: dict[str, Any] = {"prepare_threshold": settings.DB_PREPARE_THRESHOLD}
+if settings.DB_STATEMENT_TIMEOUT_MS:
+    connect_args["options"] = f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"
+
+engine = create_engine(
+    str(settings.SQLALCHEMY_DATABASE_URI),
+    connect_args=connect_args,
+    poolclass=MonitoredQueuePool,
+    pool_size=settings.DB_POOL_SIZE,
+    max_overflow=settings.DB_MAX_OVERFLOW,
+    pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+    pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    pool_pre_ping=settings.DB_POOL_PRE_PING,
+)
+
+
+def create_async_db_engine(url: str) -> AsyncEngine:
+    return create_async_engine(
+        url,
+        connect_args=connect_args,
+        poolclass=MonitoredAsyncQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+    )
+
+
+# psycopg in async mode, used by the async routes through AsyncSessionDep.
+# It has its own pool with the same settings as the sync engine.
+async_engine = create_async_db_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+async_replica_engines = [
+    create_async_db_engine(str(uri)) for uri in settings.SQLALCHEMY_REPLICA_URIS
+]
+
+# Per-request statement counts and the slow query log, see
+# app.core.query_counter and app.core.slow_queries
+instrument(engine)
+slow_query_log.instrument(engine)
+for db_engine in [async_engine, *async_replica_engines]:
+    instrument(db_engine)
+    slow_query_log.instrument(db_engine)
+# EXPLAIN runs in a background thread, so it needs the sync engine
+slow_query_log.explain_engine = engine
+
+
+def new_async_session(*, read_only: bool = False) -> AsyncSession:
+    """
+    Open an async session on the primary, or on a replica when read_only.
 
-engine = create_engine(str(settings.SQLALCHEMY_DATABASE_URI))
+    Objects stay loaded after commit, expired attributes can't be lazy
+    loaded once the response is being serialized.
+    """
+    info = {}
+    if read_only and async_replica_engines:
+        # One replica per session so all reads see the same snapshot
+        info["replica"] = random.choice(async_replica_engines).sync_engine
+    return AsyncSession(
+        async_engine,
+        sync_session_class=RoutingSession,
+        expire_on_commit=False,
+        info=info,
+    )
 
 
 # make sure all SQLModel models are imported (app.models) before initializing DB
@@ -21,9 +95,7 @@ def init_db(session: Session) -> None:
     # This works because the models are already imported and registered from app.models
     # SQLModel.metadata.create_all(engine)
 
-    user = session.exec(
-        select(User).where(User.email == settings.FIRST_SUPERUSER)
-    ).first()
+    user = crud.get_user_by_email(session=session, email=settings.FIRST_SUPERUSER)
     if not user:
         user_in = UserCreate(
             email=settings.FIRST_SUPERUSER,
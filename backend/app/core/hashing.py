@@ -0,0 +1,151 @@
+"""
+密码哈希执行器
+
+bcrypt 哈希/校验是纯 CPU 计算, 放在独立的进程池中执行,
+避免占用 AnyIO 线程池导致其他同步接口排队
+"""
+
+import asyncio
+import multiprocessing
+import threading
+import time
+from collections.abc import Callable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Any, TypeVar
+
+from app.common import BusinessCode, SystemException
+from app.core import security
+from app.core.config import settings
+
+T = TypeVar("T")
+
+
+@dataclass
+class PasswordHasherStats:
+    workers: int
+    queue_size: int
+    queue_depth: int
+    completed: int
+    rejected: int
+    avg_latency_ms: float
+    max_latency_ms: float
+
+
+class PasswordHasher:
+    """
+    进程池密码哈希器
+
+    超过 max_queue_size 的并发请求直接拒绝 (503), 不再继续排队
+    """
+
+    # 每个批量哈希任务包含的密码数, bcrypt 单个约 200ms
+    HASH_MANY_BATCH = 4
+
+    def __init__(
+        self, max_workers: int, max_queue_size: int, reserved_workers: int = 0
+    ) -> None:
+        self.max_workers = max_workers
+        self.max_queue_size = max_queue_size
+        # hash_many 不占用的 worker 数, 留给同一进程池中的单个哈希/校验
+        self.reserved_workers = reserved_workers
+        self._executor: ProcessPoolExecutor | None = None
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._completed = 0
+        self._rejected = 0
+        self._total_latency = 0.0
+        self._max_latency = 0.0
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._executor is None:
+                # spawn: 避免在多线程的服务进程中 fork
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._executor
+
+    async def _run(self, fn: Callable[..., T], *args: Any) -> T:
+        with self._lock:
+            if self._pending >= self.max_queue_size:
+                self._rejected += 1
+                raise SystemException(
+                    code=BusinessCode.SERVICE_UNAVAILABLE,
+                    message="密码服务繁忙, 请稍后重试",
+                )
+            self._pending += 1
+        start = time.perf_counter()
+        try:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self._get_executor(), fn, *args)
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._lock:
+                self._pending -= 1
+                self._completed += 1
+                self._total_latency += elapsed
+                self._max_latency = max(self._max_latency, elapsed)
+
+    async def hash(self, password: str) -> str:
+        return await self._run(security.get_password_hash, password)
+
+    async def hash_many(self, passwords: Sequence[str]) -> list[str]:
+        """
+        批量哈希. 按 HASH_MANY_BATCH 个一组提交小任务, 同时最多占用
+        max_workers - reserved_workers 个 worker
+        """
+        size = self.HASH_MANY_BATCH
+        limit = asyncio.Semaphore(max(self.max_workers - self.reserved_workers, 1))
+
+        async def run(batch: list[str]) -> list[str]:
+            async with limit:
+                return await self._run(security.get_password_hashes, batch)
+
+        results = await asyncio.gather(
+            *(
+                run(list(passwords[i : i + size]))
+                for i in range(0, len(passwords), size)
+            )
+        )
+        return [hashed for batch in results for hashed in batch]
+
+    async def verify(self, plain_password: str, hashed_password: str) -> bool:
+        return await self._run(
+            security.verify_password, plain_password, hashed_password
+        )
+
+    async def verify_and_update(
+        self, plain_password: str, hashed_password: str
+    ) -> tuple[bool, str | None]:
+        return await self._run(
+            security.verify_and_update_password, plain_password, hashed_password
+        )
+
+    def stats(self) -> PasswordHasherStats:
+        with self._lock:
+            avg = self._total_latency / self._completed if self._completed else 0.0
+            return PasswordHasherStats(
+                workers=self.max_workers,
+                queue_size=self.max_queue_size,
+                queue_depth=self._pending,
+                completed=self._completed,
+                rejected=self._rejected,
+                avg_latency_ms=round(avg * 1000, 3),
+                max_latency_ms=round(self._max_latency * 1000, 3),
+            )
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+
+password_hasher = PasswordHasher(
+    max_workers=settings.PASSWORD_HASH_WORKERS,
+    max_queue_size=settings.PASSWORD_HASH_QUEUE_SIZE,
+    # 通过接口导入用户时, 登录请求仍能及时拿到 worker
+    reserved_workers=1,
+)
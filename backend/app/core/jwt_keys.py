@@ -0,0 +1,135 @@
+"""
+JWT 密钥环
+
+启动时一次性解析签名密钥, 按 kid 选择校验密钥, 并生成公开的 JWKS.
+配置了 JWT_KEYS_DIR 时使用非对称算法 (RS256 / EdDSA), 其他服务可以
+通过 JWKS 在本地校验 token; 未配置时沿用 SECRET_KEY + HS256
+"""
+
+from dataclasses import dataclass
+from functools import cache
+from pathlib import Path
+from typing import Any
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from jwt.algorithms import get_default_algorithms
+from jwt.exceptions import InvalidTokenError
+
+from app.core.config import settings
+
+HS_ALGORITHM = "HS256"
+
+
+@dataclass(frozen=True)
+class JWTKey:
+    kid: str | None
+    algorithm: str
+    # 仅有公钥的密钥 (已退役) 为 None, 只能用于校验
+    signing_key: Any
+    verifying_key: Any
+
+    @property
+    def can_sign(self) -> bool:
+        return self.signing_key is not None
+
+
+def load_pem_key(kid: str, data: bytes) -> JWTKey:
+    try:
+        private_key: Any = serialization.load_pem_private_key(data, password=None)
+        public_key: Any = private_key.public_key()
+    except ValueError:
+        private_key = None
+        public_key = serialization.load_pem_public_key(data)
+    if isinstance(public_key, rsa.RSAPublicKey):
+        algorithm = "RS256"
+    elif isinstance(public_key, ed25519.Ed25519PublicKey):
+        algorithm = "EdDSA"
+    else:
+        raise ValueError(f"Unsupported JWT key type for kid {kid!r}")
+    return JWTKey(
+        kid=kid, algorithm=algorithm, signing_key=private_key, verifying_key=public_key
+    )
+
+
+class KeyRing:
+    """
+    已解析的 JWT 密钥集合
+
+    新 token 由 active 密钥签发, 校验时按 token 头中的 kid 选择密钥,
+    因此轮换密钥后旧 token 在过期前仍然有效
+    """
+
+    def __init__(self, keys: list[JWTKey], active_kid: str | None = None) -> None:
+        if not keys:
+            raise ValueError("JWT key ring is empty")
+        self._keys = {key.kid: key for key in keys}
+        if active_kid is None:
+            signers = sorted(
+                (key for key in keys if key.can_sign), key=lambda k: k.kid or ""
+            )
+            if not signers:
+                raise ValueError("JWT key ring has no private key to sign with")
+            active_kid = signers[-1].kid
+        active = self._keys.get(active_kid)
+        if active is None or not active.can_sign:
+            raise ValueError(f"JWT signing key {active_kid!r} not found")
+        self.active = active
+        self._jwks = self._build_jwks()
+
+    @classmethod
+    def from_secret(cls, secret: str) -> "KeyRing":
+        key = JWTKey(
+            kid=None, algorithm=HS_ALGORITHM, signing_key=secret, verifying_key=secret
+        )
+        return cls([key])
+
+    @classmethod
+    def from_directory(
+        cls, directory: Path | str, active_kid: str | None = None
+    ) -> "KeyRing":
+        """
+        从目录加载 <kid>.pem 文件, 私钥可签发和校验, 公钥只用于校验
+        """
+        keys = [
+            load_pem_key(path.stem, path.read_bytes())
+            for path in sorted(Path(directory).glob("*.pem"))
+        ]
+        return cls(keys, active_kid)
+
+    def _build_jwks(self) -> dict[str, Any]:
+        algorithms = get_default_algorithms()
+        jwks = []
+        for key in self._keys.values():
+            # 对称密钥不能公开
+            if key.algorithm == HS_ALGORITHM:
+                continue
+            jwk = algorithms[key.algorithm].to_jwk(key.verifying_key, as_dict=True)
+            jwks.append({**jwk, "kid": key.kid, "alg": key.algorithm, "use": "sig"})
+        return {"keys": jwks}
+
+    def jwks(self) -> dict[str, Any]:
+        return self._jwks
+
+    def encode(self, payload: dict[str, Any]) -> str:
+        key = self.active
+        headers = {"kid": key.kid} if key.kid else None
+        return jwt.encode(
+            payload, key.signing_key, algorithm=key.algorithm, headers=headers
+        )
+
+    def decode(self, token: str) -> dict[str, Any]:
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = self._keys.get(kid)
+        if key is None:
+            raise InvalidTokenError(f"Unknown JWT key id {kid!r}")
+        # 只接受该密钥自身的算法, 防止算法混淆
+        return jwt.decode(token, key.verifying_key, algorithms=[key.algorithm])
+
+
+@cache
+def get_key_ring() -> KeyRing:
+    if settings.JWT_KEYS_DIR:
+        return KeyRing.from_directory(settings.JWT_KEYS_DIR, settings.JWT_ACTIVE_KEY_ID)
+    return KeyRing.from_secret(settings.SECRET_KEY)
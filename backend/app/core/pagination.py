@@ -0,0 +1,270 @@
+"""
+列表分页
+
+按主键排序的游标 (keyset) 分页: 下一页从上一页最后一条记录的主键之后开始,
+翻页深度不影响查询耗时. 兼容原有的 skip/limit 分页.
+总数可以精确统计, 使用规划器估算, 或者不统计.
+精确统计时, 总数与本页数据按 LIST_QUERY_MODE 在一次往返中取回
+"""
+
+import base64
+import json
+import time
+import uuid
+from collections.abc import Sequence
+from dataclasses import dataclass
+from typing import Any, Generic, Literal, TypeVar
+
+import psycopg
+from psycopg import AsyncPipeline
+from psycopg.rows import dict_row
+from sqlalchemy import ColumnElement, Select
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import aliased
+from sqlmodel import col, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import SelectOfScalar
+
+from app.core.config import settings
+from app.core.query_counter import record_query
+from app.core.slow_queries import slow_query_log
+
+T = TypeVar("T")
+SelectT = TypeVar("SelectT", bound=Select[Any])
+
+# exact: count(*); estimate: 规划器估算; none: 不统计
+CountMode = Literal["exact", "estimate", "none"]
+
+
+@dataclass(frozen=True)
+class Page:
+    skip: int
+    limit: int
+    # 上一页最后一条记录的主键, 为 None 时从头开始
+    after: uuid.UUID | None = None
+    count: CountMode = "exact"
+
+
+def encode_cursor(key: uuid.UUID) -> str:
+    raw = json.dumps({"id": str(key)}, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> uuid.UUID:
+    """
+    解析 encode_cursor 生成的游标, 格式不正确时抛出 ValueError
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        return uuid.UUID(json.loads(raw)["id"])
+    except (TypeError, KeyError, json.JSONDecodeError, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor!r}") from e
+
+
+def paginate(statement: SelectT, key: Any, page: Page) -> SelectT:
+    """
+    按 key 排序并截取一页, 多取一条用于判断是否还有下一页
+    """
+    statement = statement.order_by(col(key))
+    if page.after is not None:
+        statement = statement.where(col(key) > page.after)
+    return statement.offset(page.skip).limit(page.limit + 1)
+
+
+def split_page(
+    rows: Sequence[T], page: Page, key: str = "id"
+) -> tuple[list[T], str | None]:
+    """
+    去掉 paginate 多取的一条, 返回本页数据和下一页游标
+    """
+    data = list(rows[: page.limit])
+    if len(rows) <= page.limit or not data:
+        return data, None
+    return data, encode_cursor(getattr(data[-1], key))
+
+
+async def count_rows(
+    session: AsyncSession, statement: SelectOfScalar[Any], mode: CountMode
+) -> tuple[int | None, CountMode]:
+    """
+    统计 statement 的结果行数, 返回 (总数, 实际使用的统计方式)
+
+    estimate 使用 EXPLAIN 的规划器估算, 不扫描数据; 估算值较小时直接精确统计
+    """
+    if mode == "none":
+        return None, "none"
+    if mode == "estimate":
+        connection = await session.connection()
+        compiled = statement.compile(dialect=connection.dialect)
+        result = await connection.exec_driver_sql(
+            f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+        )
+        plan = result.scalar_one()
+        estimate = int(plan[0]["Plan"]["Plan Rows"])
+        if estimate >= settings.COUNT_ESTIMATE_EXACT_BELOW:
+            return estimate, "estimate"
+    count_statement = select(func.count()).select_from(statement.subquery())
+    return (await session.exec(count_statement)).one(), "exact"
+
+
+@dataclass
+class PageResult(Generic[T]):
+    data: list[T]
+    count: int | None
+    count_type: CountMode
+    next_cursor: str | None
+
+
+async def run_pipeline(
+    session: AsyncSession, *statements: Select[Any]
+) -> list[list[dict[str, Any]]]:
+    """
+    使用 psycopg 的 pipeline 模式在一次往返中执行多条相互独立的查询,
+    按顺序返回各自的结果行. 结果不经过 ORM, 每行为列名到值的字典
+    """
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    driver_connection = raw_connection.driver_connection
+    assert driver_connection is not None
+    compiled = [
+        statement.compile(
+            dialect=connection.dialect, compile_kwargs={"render_postcompile": True}
+        )
+        for statement in statements
+    ]
+    cursors = [driver_connection.cursor(row_factory=dict_row) for _ in compiled]
+    start = time.perf_counter()
+    try:
+        async with driver_connection.pipeline():
+            for cursor, query in zip(cursors, compiled, strict=True):
+                await cursor.execute(str(query), query.params)
+        return [await cursor.fetchall() for cursor in cursors]
+    except psycopg.Error as e:
+        # 与经过 SQLAlchemy 执行的查询一样抛出 DBAPIError, 超时等按同样方式处理
+        raise DBAPIError.instance(
+            "; ".join(str(query) for query in compiled), None, e, psycopg.Error
+        ) from e
+    finally:
+        for cursor in cursors:
+            await cursor.close()
+        # 驱动连接上的查询不触发引擎事件, 在这里计数并检查慢查询.
+        # 各语句的耗时无法分开, 计数时平分总耗时, 慢查询按整个 pipeline 的耗时判断
+        elapsed = time.perf_counter() - start
+        for query in compiled:
+            record_query(str(query), elapsed / len(compiled))
+            slow_query_log.observe(str(query), query.params, elapsed * 1000)
+
+
+async def _fetch_windowed(
+    session: AsyncSession, statement: SelectOfScalar[T], key: Any, page: Page
+) -> tuple[list[T], int | None]:
+    # 在子查询中统计, 游标条件放在外层, 总数不受翻页位置影响.
+    # 代价是每一页都要扫描全部匹配行, 游标分页不再与翻页深度无关
+    model = statement.column_descriptions[0]["entity"]
+    counted = statement.add_columns(func.count().over().label("total")).subquery()
+    entity = aliased(model, counted)
+    windowed = select(entity, counted.c.total)
+    rows = (
+        await session.exec(paginate(windowed, getattr(entity, key.key), page))
+    ).all()
+    if rows:
+        return [row[0] for row in rows], rows[0][1]
+    # 本页没有数据时窗口函数拿不到总数
+    return [], None
+
+
+async def _fetch_pipelined(
+    session: AsyncSession, statement: SelectOfScalar[T], key: Any, page: Page
+) -> tuple[list[T], int | None]:
+    model = statement.column_descriptions[0]["entity"]
+    count_result, page_rows = await run_pipeline(
+        session,
+        select(func.count().label("total")).select_from(statement.subquery()),
+        paginate(statement, key, page),
+    )
+    return [model.model_validate(row) for row in page_rows], count_result[0]["total"]
+
+
+async def fetch_page(
+    session: AsyncSession, statement: SelectOfScalar[T], key: Any, page: Page
+) -> PageResult[T]:
+    """
+    按 page 取一页数据及总数, 供各列表接口使用
+
+    精确统计时按 LIST_QUERY_MODE 减少往返: pipeline (默认) 把统计和分页两条查询
+    一起发送, 不支持时退回 separate; window 在分页查询中附带 count(*) OVER (),
+    每页都要扫描全部匹配行, 只适合小表; separate 以及估算/不统计时依次执行
+    """
+    mode = settings.LIST_QUERY_MODE
+    if mode == "pipeline" and not AsyncPipeline.is_supported():
+        mode = "separate"
+    count: int | None
+    if page.count != "exact" or mode == "separate":
+        count, count_type = await count_rows(session, statement, page.count)
+        rows = list((await session.exec(paginate(statement, key, page))).all())
+    else:
+        count_type = "exact"
+        if mode == "pipeline":
+            rows, count = await _fetch_pipelined(session, statement, key, page)
+        else:
+            rows, count = await _fetch_windowed(session, statement, key, page)
+        if count is None:
+            if page.skip or page.after is not None:
+                count, count_type = await count_rows(session, statement, "exact")
+            else:
+                count = 0
+    data, next_cursor = split_page(rows, page, key=key.key)
+    return PageResult(
+        data=data, count=count, count_type=count_type, next_cursor=next_cursor
+    )
+
+
+async def fetch_ranked_page(
+    session: AsyncSession,
+    statement: SelectOfScalar[T],
+    rank: ColumnElement[Any],
+    key: Any,
+    page: Page,
+) -> PageResult[T]:
+    """
+    按 rank 从高到低 (相同时按 key) 取一页, 用于搜索结果. 只支持 skip/limit 分页,
+    不返回游标. 精确总数在分页查询中通过 count(*) OVER () 一起取回
+    """
+    count: int | None
+    if page.count != "exact":
+        count, count_type = await count_rows(session, statement, page.count)
+        ranked = (
+            statement.order_by(rank.desc(), col(key))
+            .offset(page.skip)
+            .limit(page.limit)
+        )
+        return PageResult(
+            data=list((await session.exec(ranked)).all()),
+            count=count,
+            count_type=count_type,
+            next_cursor=None,
+        )
+    model = statement.column_descriptions[0]["entity"]
+    counted = statement.add_columns(
+        rank.label("rank"), func.count().over().label("total")
+    ).subquery()
+    entity = aliased(model, counted)
+    windowed = (
+        select(entity, counted.c.total)
+        .order_by(counted.c.rank.desc(), getattr(entity, key.key))
+        .offset(page.skip)
+        .limit(page.limit)
+    )
+    rows = (await session.exec(windowed)).all()
+    if rows:
+        count = rows[0][1]
+    elif page.skip:
+        count, _ = await count_rows(session, statement, "exact")
+    else:
+        count = 0
+    return PageResult(
+        data=[row[0] for row in rows],
+        count=count,
+        count_type="exact",
+        next_cursor=None,
+    )
@@ -0,0 +1,135 @@
+"""
+数据库连接池监控
+
+记录每次获取连接的等待时间和超时次数, 提供连接池快照和启动预热.
+每个 worker 进程各自持有一个连接池, 单进程最多占用 size + max_overflow 个连接
+"""
+
+import logging
+import os
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import Engine, exc
+from sqlalchemy.ext.asyncio import AsyncEngine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, ConnectionPoolEntry, QueuePool
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class PoolStats:
+    pid: int
+    size: int
+    max_overflow: int
+    checked_in: int
+    checked_out: int
+    overflow: int
+    checkouts: int
+    timeouts: int
+    avg_wait_ms: float
+    max_wait_ms: float
+
+
+class MonitoredQueuePool(QueuePool):
+    """
+    统计连接获取耗时的 QueuePool
+
+    耗时包含池满时的排队等待以及新建连接的时间
+    """
+
+    # 沿用 sqlalchemy.pool 的 logger, 默认只输出 WARNING 以上的日志
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.MonitoredQueuePool"
+
+    def __init__(self, *args: Any, **kwargs: Any) -> None:
+        super().__init__(*args, **kwargs)
+        self._stats_lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    def _do_get(self) -> ConnectionPoolEntry:
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        except exc.TimeoutError:
+            with self._stats_lock:
+                self.timeouts += 1
+            raise
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._stats_lock:
+                self.checkouts += 1
+                self.total_wait += elapsed
+                self.max_wait = max(self.max_wait, elapsed)
+
+    def stats(self) -> PoolStats:
+        with self._stats_lock:
+            avg = self.total_wait / self.checkouts if self.checkouts else 0.0
+            return PoolStats(
+                pid=os.getpid(),
+                size=self.size(),
+                max_overflow=self._max_overflow,
+                checked_in=self.checkedin(),
+                checked_out=self.checkedout(),
+                # 未打满 size 之前 QueuePool 的 overflow 为负数
+                overflow=max(self.overflow(), 0),
+                checkouts=self.checkouts,
+                timeouts=self.timeouts,
+                avg_wait_ms=round(avg * 1000, 3),
+                max_wait_ms=round(self.max_wait * 1000, 3),
+            )
+
+
+class MonitoredAsyncQueuePool(MonitoredQueuePool, AsyncAdaptedQueuePool):
+    """AsyncEngine 使用的 MonitoredQueuePool"""
+
+    _sqla_logger_namespace = "sqlalchemy.pool.impl.MonitoredAsyncQueuePool"
+
+
+def pool_stats(engine: Engine | AsyncEngine) -> PoolStats | None:
+    pool = engine.pool
+    return pool.stats() if isinstance(pool, MonitoredQueuePool) else None
+
+
+def warm_up(engine: Engine, min_size: int) -> int:
+    """
+    预先建立 min_size 个连接并放回池中, 返回成功建立的连接数
+
+    数据库不可用时只记录警告, 不阻止服务启动
+    """
+    pool = engine.pool
+    if isinstance(pool, QueuePool):
+        min_size = min(min_size, pool.size())
+    connections = []
+    try:
+        for _ in range(min_size):
+            connections.append(engine.connect())
+    except exc.SQLAlchemyError as e:
+        logger.warning(f"Connection pool warm-up stopped: {e}")
+    finally:
+        for connection in connections:
+            connection.close()
+    return len(connections)
+
+
+async def warm_up_async(engine: AsyncEngine, min_size: int) -> int:
+    """
+    warm_up 的 AsyncEngine 版本
+    """
+    pool = engine.pool
+    if isinstance(pool, QueuePool):
+        min_size = min(min_size, pool.size())
+    connections = []
+    try:
+        for _ in range(min_size):
+            connections.append(await engine.connect())
+    except exc.SQLAlchemyError as e:
+        logger.warning(f"Async connection pool warm-up stopped: {e}")
+    finally:
+        for connection in connections:
+            await connection.close()
+    return len(connections)
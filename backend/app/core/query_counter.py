@@ -0,0 +1,146 @@
+"""
+SQL 查询计数
+
+通过引擎事件统计每个请求执行的 SQL 语句数和数据库耗时,
+开启 DB_QUERY_HEADERS 后写入响应头 X-DB-Queries / X-DB-Time (毫秒).
+同一条语句在一个请求中执行次数达到 DB_N_PLUS_ONE_THRESHOLD 时记录警告, 多半是 N+1 查询.
+统计中同时保存所属请求的路由和请求 ID, 供慢查询日志使用
+"""
+
+import logging
+import time
+import uuid
+from collections import Counter
+from collections.abc import Iterator
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any
+
+from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueryStats:
+    count: int = 0
+    # 秒
+    duration: float = 0.0
+    # 按 SQL 文本 (参数为占位符) 统计的执行次数
+    statements: Counter[str] = field(default_factory=Counter)
+    request_id: str | None = None
+    # 所属请求的 ASGI scope, 路由匹配之后其中有 "route"
+    scope: Scope | None = field(default=None, repr=False)
+
+    @property
+    def route(self) -> str | None:
+        """
+        "方法 路由模板", 尚未匹配路由时使用请求路径
+        """
+        if self.scope is None:
+            return None
+        path = getattr(self.scope.get("route"), "path", self.scope["path"])
+        return f"{self.scope['method']} {path}"
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        return [(sql, n) for sql, n in self.statements.items() if n >= threshold]
+
+
+_current: ContextVar[QueryStats | None] = ContextVar("query_stats", default=None)
+
+
+def current_stats() -> QueryStats | None:
+    return _current.get()
+
+
+@contextmanager
+def track_queries(
+    scope: Scope | None = None, request_id: str | None = None
+) -> Iterator[QueryStats]:
+    """
+    统计代码块内 (包括其中启动的线程池任务) 执行的查询
+    """
+    stats = QueryStats(request_id=request_id, scope=scope)
+    token = _current.set(stats)
+    try:
+        yield stats
+    finally:
+        _current.reset(token)
+
+
+def _before_cursor_execute(**kw: Any) -> None:
+    # 开始时间记在本次执行的 ExecutionContext 上
+    context = kw["context"]
+    if context is not None and _current.get() is not None:
+        context._query_counter_start = time.perf_counter()
+
+
+def _after_cursor_execute(**kw: Any) -> None:
+    start = getattr(kw["context"], "_query_counter_start", None)
+    if start is not None:
+        record_query(kw["statement"], time.perf_counter() - start)
+
+
+def record_query(statement: str, duration: float) -> None:
+    """
+    计入一条语句. 不经过引擎事件执行的查询 (如 pipeline 模式) 需要调用方自行记录
+    """
+    stats = _current.get()
+    if stats is None:
+        return
+    stats.count += 1
+    stats.duration += duration
+    stats.statements[statement] += 1
+
+
+def instrument(engine: Engine | AsyncEngine) -> None:
+    """
+    为引擎注册计数事件
+    """
+    if isinstance(engine, AsyncEngine):
+        engine = engine.sync_engine
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute, named=True)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute, named=True)
+
+
+class QueryCounterMiddleware:
+    """
+    为每个 HTTP 请求统计查询. 流式响应在响应头发出之后执行的查询不计入响应头
+    """
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        headers_enabled = settings.DB_QUERY_HEADERS
+        threshold = settings.DB_N_PLUS_ONE_THRESHOLD
+        if scope["type"] != "http" or not (
+            headers_enabled or threshold or settings.DB_SLOW_QUERY_MS
+        ):
+            await self.app(scope, receive, send)
+            return
+
+        request_id = Headers(scope=scope).get("X-Request-ID") or uuid.uuid4().hex
+        with track_queries(scope, request_id) as stats:
+
+            async def send_with_stats(message: Message) -> None:
+                if message["type"] == "http.response.start" and headers_enabled:
+                    headers = MutableHeaders(scope=message)
+                    headers["X-DB-Queries"] = str(stats.count)
+                    headers["X-DB-Time"] = f"{stats.duration * 1000:.1f}"
+                await send(message)
+
+            try:
+                await self.app(scope, receive, send_with_stats)
+            finally:
+                for statement, count in stats.repeated(threshold) if threshold else []:
+                    logger.warning(
+                        f"Possible N+1 query: {stats.route} "
+                        f"ran {count} times: {statement[:200]}"
+                    )
@@ -0,0 +1,143 @@
+"""
+读写分离
+
+只读的 GET 请求由副本处理, 其余请求走主库.
+用户写入后的一段时间内其读请求也固定走主库, 保证能读到自己刚写入的数据
+"""
+
+import logging
+import sqlite3
+import threading
+import time
+import uuid
+from concurrent.futures import Future, ThreadPoolExecutor
+from pathlib import Path
+from typing import Any
+
+from sqlalchemy import event
+from sqlmodel import Session
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.core.shared_sqlite import SharedSQLite, default_store_path
+
+logger = logging.getLogger(__name__)
+
+
+class StickyStore:
+    """
+    记录最近写入过的用户, 与登录限流一样放在 /dev/shm 的 SQLite 文件中,
+    同一主机上的所有 worker 进程共享.
+
+    pin 和 is_pinned 都在事件循环中调用, 不能等锁: pin 先记入内存,
+    写文件交给后台线程; is_pinned 先查内存, 查文件时不等待 SQLite 的锁,
+    文件被锁住时按已固定处理 (走主库)
+    """
+
+    def __init__(self, path: Path | str, window: float) -> None:
+        self.window = window
+        self._db = SharedSQLite(
+            path,
+            schema=[
+                "CREATE TABLE IF NOT EXISTS sticky "
+                "(key TEXT PRIMARY KEY, until REAL NOT NULL)"
+            ],
+        )
+        # 本进程最近的写入, key -> 截止时间
+        self._recent: dict[str, float] = {}
+        self._read_lock = threading.Lock()
+        self._reader: sqlite3.Connection | None = None
+        self._pins = 0
+        self._executor_lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+
+    def pin(self, key: str) -> Future[None]:
+        """
+        本进程立即生效, 返回写入共享文件的 Future
+        """
+        now = time.time()
+        self._recent[key] = now + self.window
+        self._pins += 1
+        if self._pins % SharedSQLite.PRUNE_EVERY == 0:
+            self._recent = {k: t for k, t in self._recent.items() if t >= now}
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=1, thread_name_prefix="replica-sticky"
+                )
+            return self._executor.submit(self._write, key, now + self.window)
+
+    def _write(self, key: str, until: float) -> None:
+        now = time.time()
+        try:
+            with self._db.locked() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO sticky (key, until) VALUES (?, ?)",
+                    (key, until),
+                )
+                if self._db.should_prune():
+                    conn.execute("DELETE FROM sticky WHERE until < ?", (now,))
+        except sqlite3.Error:
+            # 尽力而为: 其他 worker 看不到这次写入, 最多读到副本上稍旧的数据
+            logger.warning("Failed to record replica sticky pin", exc_info=True)
+
+    def is_pinned(self, key: str) -> bool:
+        now = time.time()
+        if self._recent.get(key, 0) > now:
+            return True
+        with self._read_lock:
+            try:
+                if self._reader is None:
+                    self._reader = self._db.connect(busy_timeout=0)
+                row = self._reader.execute(
+                    "SELECT until FROM sticky WHERE key = ?", (key,)
+                ).fetchone()
+            except sqlite3.OperationalError:
+                return True
+        return bool(row) and row[0] > now
+
+    def shutdown(self) -> None:
+        """
+        等待尚未写入文件的记录
+        """
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+
+sticky_store = StickyStore(
+    settings.DB_REPLICA_STICKY_STORE_PATH or default_store_path("replica-sticky"),
+    window=settings.DB_REPLICA_STICKY_SECONDS,
+)
+
+
+class RoutingSession(Session):
+    """
+    session.info 中带有 replica 引擎时, 查询发往该副本; flush 始终走主库.
+    执行时传入 bind_arguments={"primary": True} 的查询也走主库
+    """
+
+    def get_bind(self, *args: Any, primary: bool = False, **kwargs: Any) -> Any:
+        replica = self.info.get("replica")
+        if replica is not None and not self._flushing and not primary:
+            return replica
+        return super().get_bind(*args, **kwargs)
+
+
+def bind_principal(session: Session | AsyncSession, user_id: uuid.UUID) -> None:
+    """
+    记录 session 所属用户; 该用户最近有写入时, 本次请求改走主库
+
+    需在 session 执行第一条查询之前调用
+    """
+    session.info["principal_id"] = user_id
+    if "replica" in session.info and sticky_store.is_pinned(str(user_id)):
+        del session.info["replica"]
+
+
+@event.listens_for(RoutingSession, "after_commit")
+def _pin_writer(session: Session) -> None:
+    user_id = session.info.get("principal_id")
+    if user_id is not None and settings.POSTGRES_REPLICA_SERVERS:
+        sticky_store.pin(str(user_id))
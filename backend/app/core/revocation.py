@@ -0,0 +1,98 @@
+"""
+Token 吊销列表
+
+已吊销的 jti 持久化在 revokedtoken 表中, 每个进程在内存里维护一份镜像,
+按固定间隔增量同步, 使请求路径上的吊销检查为 O(1) 且无需查询数据库
+"""
+
+import threading
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy.dialects.postgresql import insert
+from sqlmodel import col, delete, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app.core.config import settings
+from app.models import RevokedToken
+
+# revoked_at 是事务开始的时间, 提交可能晚于之后开始的事务.
+# 增量同步时向前多取这么长时间, 覆盖提交的先后差
+SYNC_SKEW = timedelta(seconds=5)
+
+
+class RevocationList:
+    def __init__(self, refresh_interval: float) -> None:
+        self.refresh_interval = refresh_interval
+        # jti (16 字节) -> token 过期时间 (unix 时间戳)
+        self._entries: dict[bytes, float] = {}
+        self._lock = threading.Lock()
+        self._next_refresh = 0.0
+        # 已同步到的 revoked_at, 取自数据库返回的行, 与本机时钟无关
+        self._synced_until: datetime | None = None
+
+    async def _sync(self, session: AsyncSession) -> None:
+        now = datetime.now(timezone.utc)
+        statement = select(
+            RevokedToken.jti, RevokedToken.expires_at, RevokedToken.revoked_at
+        ).where(col(RevokedToken.expires_at) > now)
+        if self._synced_until is not None:
+            statement = statement.where(
+                col(RevokedToken.revoked_at) >= self._synced_until - SYNC_SKEW
+            )
+        # 副本落后时, 刚吊销的记录在那里还看不到, 同步总是读主库
+        rows = (await session.exec(statement, bind_arguments={"primary": True})).all()
+        timestamp = now.timestamp()
+        with self._lock:
+            for jti, expires_at, revoked_at in rows:
+                self._entries[jti.bytes] = expires_at.timestamp()
+                if self._synced_until is None or revoked_at > self._synced_until:
+                    self._synced_until = revoked_at
+            # token 自然过期后不再需要记录
+            self._entries = {
+                key: exp for key, exp in self._entries.items() if exp > timestamp
+            }
+
+    async def is_revoked(self, session: AsyncSession, jti: str | None) -> bool:
+        if jti is None:
+            return False
+        if time.monotonic() >= self._next_refresh:
+            self._next_refresh = time.monotonic() + self.refresh_interval
+            await self._sync(session)
+        try:
+            key = uuid.UUID(jti).bytes
+        except ValueError:
+            return True
+        with self._lock:
+            return key in self._entries
+
+    async def revoke(
+        self, session: AsyncSession, jti: str, expires_at: datetime
+    ) -> None:
+        statement = (
+            insert(RevokedToken)
+            .values(jti=uuid.UUID(jti), expires_at=expires_at, revoked_at=func.now())
+            .on_conflict_do_nothing()
+        )
+        await session.exec(statement)  # type: ignore
+        # 顺带清理已过期的记录
+        await session.exec(  # type: ignore
+            delete(RevokedToken).where(
+                col(RevokedToken.expires_at) <= datetime.now(timezone.utc)
+            )
+        )
+        await session.commit()
+        with self._lock:
+            self._entries[uuid.UUID(jti).bytes] = expires_at.timestamp()
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._synced_until = None
+            self._next_refresh = 0.0
+
+
+revocation_list = RevocationList(
+    refresh_interval=settings.TOKEN_REVOCATION_REFRESH_SECONDS
+)
@@ -0,0 +1,34 @@
+"""
+全文搜索
+
+item 表的 search_vector 是由 title (权重 A) 和 description (权重 B) 生成的 tsvector 列,
+由数据库在写入时维护, 带 GIN 索引. 该列不映射到模型, 查询时通过 literal_column 引用,
+alembic 自动生成迁移时也会跳过它 (见 alembic/env.py).
+
+搜索词按 websearch_to_tsquery 解析 (支持 "短语", or 和 -排除), 结果按 ts_rank 排序.
+使用 simple 配置, 不做词干处理, 与语言无关
+"""
+
+from typing import Any
+
+from sqlalchemy import ColumnElement, func, literal_column
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlmodel.sql.expression import SelectOfScalar
+
+from app.models import Item
+
+SEARCH_CONFIG = "simple"
+ITEM_SEARCH_COLUMN = "search_vector"
+ITEM_SEARCH_INDEX = "ix_item_search_vector"
+
+
+def search_items(
+    statement: SelectOfScalar[Item], search: str
+) -> tuple[SelectOfScalar[Item], ColumnElement[Any]]:
+    """
+    只保留匹配 search 的 item, 返回查询和相关度表达式
+    """
+    vector = literal_column(f"{Item.__tablename__}.{ITEM_SEARCH_COLUMN}", TSVECTOR)
+    query = func.websearch_to_tsquery(SEARCH_CONFIG, search)
+    rank = func.ts_rank(vector, query)
+    return statement.where(vector.bool_op("@@")(query)), rank
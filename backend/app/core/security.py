@@ -1,22 +1,71 @@
+import uuid
 from datetime import datetime, timedelta, timezone
 from typing import Any
 
-import jwt
 from passlib.context import CryptContext
 
 from app.core.config import settings
+from app.core.jwt_keys import get_key_ring
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+PASSWORD_HASH_SCHEMES = ("bcrypt", "argon2")
 
 
-ALGORITHM = "HS256"
+def build_pwd_context(
+    scheme: str = settings.PASSWORD_HASH_SCHEME,
+    bcrypt_rounds: int = settings.BCRYPT_ROUNDS,
+    argon2_time_cost: int = settings.ARGON2_TIME_COST,
+    argon2_memory_cost: int = settings.ARGON2_MEMORY_COST,
+) -> CryptContext:
+    # The other schemes are kept so existing hashes still verify; they (and
+    # hashes with outdated parameters) are flagged for rehash on next login.
+    return CryptContext(
+        schemes=[scheme, *(s for s in PASSWORD_HASH_SCHEMES if s != scheme)],
+        deprecated="auto",
+        bcrypt__rounds=bcrypt_rounds,
+        argon2__time_cost=argon2_time_cost,
+        argon2__memory_cost=argon2_memory_cost,
+    )
 
 
-def create_access_token(subject: str | Any, expires_delta: timedelta) -> str:
+pwd_context = build_pwd_context()
+
+
+def encode_jwt(payload: dict[str, Any]) -> str:
+    return get_key_ring().encode(payload)
+
+
+def decode_jwt(token: str) -> dict[str, Any]:
+    return get_key_ring().decode(token)
+
+
+def create_token(
+    subject: str | Any,
+    expires_delta: timedelta,
+    token_type: str,
+    claims: dict[str, Any] | None = None,
+) -> str:
+    # type tells tokens signed with the same published keys apart
     expire = datetime.now(timezone.utc) + expires_delta
-    to_encode = {"exp": expire, "sub": str(subject)}
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=ALGORITHM)
-    return encoded_jwt
+    to_encode = {
+        **(claims or {}),
+        "type": token_type,
+        "exp": expire,
+        "sub": str(subject),
+        "jti": uuid.uuid4().hex,
+    }
+    return encode_jwt(to_encode)
+
+
+def create_access_token(
+    subject: str | Any,
+    expires_delta: timedelta,
+    claims: dict[str, Any] | None = None,
+) -> str:
+    return create_token(subject, expires_delta, "access", claims)
+
+
+def create_refresh_token(subject: str | Any, expires_delta: timedelta) -> str:
+    return create_token(subject, expires_delta, "refresh")
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -25,3 +74,16 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 
 def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
+
+
+def get_password_hashes(passwords: list[str]) -> list[str]:
+    return [pwd_context.hash(password) for password in passwords]
+
+
+def verify_and_update_password(
+    plain_password: str, hashed_password: str
+) -> tuple[bool, str | None]:
+    """
+    Verify a password and return a new hash if the stored one is outdated.
+    """
+    return pwd_context.verify_and_update(plain_password, hashed_password)
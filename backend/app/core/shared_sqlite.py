@@ -0,0 +1,68 @@
+"""
+进程间共享的 SQLite 文件
+
+放在 /dev/shm (内存文件系统) 中, uvicorn --workers 启动的同一主机上的各进程共用.
+使用 WAL 模式, 读不会被写阻塞. 登录限流和读写分离的粘滞记录都基于它
+"""
+
+import sqlite3
+import tempfile
+import threading
+from collections.abc import Iterator, Sequence
+from contextlib import contextmanager
+from pathlib import Path
+
+from app.core.config import settings
+
+
+def default_store_path(name: str) -> Path:
+    # /dev/shm 是内存文件系统, 同一主机上的所有 worker 进程共享
+    shm = Path("/dev/shm")
+    directory = shm if shm.is_dir() else Path(tempfile.gettempdir())
+    return directory / f"{settings.PROJECT_NAME}-{name}.sqlite3"
+
+
+class SharedSQLite:
+    """
+    一个共享 SQLite 文件, 首次连接时执行 schema 中的建表语句.
+    每 PRUNE_EVERY 次写入提示调用方清理一次过期数据
+    """
+
+    PRUNE_EVERY = 100
+
+    def __init__(self, path: Path | str, schema: Sequence[str]) -> None:
+        self.path = str(path)
+        self.schema = schema
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+        self._writes = 0
+
+    def connect(self, busy_timeout: float = 5) -> sqlite3.Connection:
+        """
+        打开一个新连接, 遇到锁时最多等待 busy_timeout 秒
+        """
+        conn = sqlite3.connect(
+            self.path, timeout=5, isolation_level=None, check_same_thread=False
+        )
+        conn.execute("PRAGMA journal_mode=WAL")
+        for statement in self.schema:
+            conn.execute(statement)
+        conn.execute(f"PRAGMA busy_timeout = {int(busy_timeout * 1000)}")
+        return conn
+
+    @contextmanager
+    def locked(self) -> Iterator[sqlite3.Connection]:
+        """
+        在线程锁内使用共享连接
+        """
+        with self._lock:
+            if self._conn is None:
+                self._conn = self.connect()
+            yield self._conn
+
+    def should_prune(self) -> bool:
+        """
+        记录一次写入, 需要清理时返回 True. 调用方需在 locked() 内调用
+        """
+        self._writes += 1
+        return self._writes % self.PRUNE_EVERY == 0
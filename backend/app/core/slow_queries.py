@@ -0,0 +1,233 @@
+"""
+慢查询日志
+
+执行时间超过 DB_SLOW_QUERY_MS 的语句记录一条警告, 包括规范化的 SQL, 脱敏后的参数,
+耗时以及所属请求的路由和请求 ID. 同一条规范化 SQL 在内存中聚合为一项,
+最多保留 DB_SLOW_QUERY_MAX_STATEMENTS 项, 满了之后丢弃总耗时最少的一项.
+
+每条规范化 SQL 第一次变慢时, 在后台线程中通过主库引擎执行 EXPLAIN (不带 ANALYZE,
+不会真正执行语句) 记录执行计划, 不拖慢当前请求. 从库上的查询同样在主库上 EXPLAIN
+"""
+
+import logging
+import re
+import threading
+import time
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field, replace
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from typing import Any, Literal
+from uuid import UUID
+
+from sqlalchemy import Engine, event
+from sqlalchemy.ext.asyncio import AsyncEngine
+
+from app.core.config import settings
+from app.core.query_counter import current_stats
+
+logger = logging.getLogger(__name__)
+
+SortKey = Literal["total", "max"]
+
+# 保存的 SQL 和执行计划的最大长度
+MAX_TEXT_LENGTH = 4000
+
+_STRING = re.compile(r"'(?:[^']|'')*'")
+_NUMBER = re.compile(r"(?<![\w$])\d+(?:\.\d+)?\b")
+_PLACEHOLDER = r"(?:\?|%s|%\(\w+\)s|\$\d+|:\w+)"
+_IN_LIST = re.compile(
+    rf"\bIN\s*\(\s*{_PLACEHOLDER}(?:\s*,\s*{_PLACEHOLDER})*\s*\)", re.I
+)
+# 一行 VALUES, 其中可以有 %(name)s 占位符
+_ROW = r"\((?:[^()]|%\(\w+\))*\)"
+_VALUES = re.compile(rf"\bVALUES\s*({_ROW})(?:\s*,\s*{_ROW})+", re.I)
+_WHITESPACE = re.compile(r"\s+")
+_EXPLAINABLE = re.compile(r"^\s*(SELECT|INSERT|UPDATE|DELETE|WITH)\b", re.I)
+_SENSITIVE = re.compile(r"password|token|secret", re.I)
+
+
+def normalize_sql(statement: str) -> str:
+    """
+    去掉字面量, 把 IN 列表和多行 VALUES 折叠为一项, 合并空白
+    """
+    sql = _STRING.sub("?", statement)
+    sql = _NUMBER.sub("?", sql)
+    sql = _IN_LIST.sub("IN (...)", sql)
+    sql = _VALUES.sub(r"VALUES \1", sql)
+    return _WHITESPACE.sub(" ", sql).strip()[:MAX_TEXT_LENGTH]
+
+
+def _redact_value(value: Any) -> Any:
+    if value is None or isinstance(value, bool | int | float):
+        return value
+    if isinstance(value, Decimal | UUID | date):
+        return str(value)
+    if isinstance(value, str | bytes):
+        return f"<{type(value).__name__} len={len(value)}>"
+    return f"<{type(value).__name__}>"
+
+
+def redact_parameters(parameters: Any) -> Any:
+    """
+    只保留数字, UUID, 日期等值, 字符串只记录长度; 名称像密码或令牌的参数整体隐藏
+    """
+    if isinstance(parameters, Mapping):
+        return {
+            str(key): "***" if _SENSITIVE.search(str(key)) else _redact_value(value)
+            for key, value in parameters.items()
+        }
+    if isinstance(parameters, list | tuple):
+        return [_redact_value(value) for value in parameters]
+    return _redact_value(parameters)
+
+
+@dataclass
+class SlowQuery:
+    duration_ms: float
+    parameters: Any
+    route: str | None
+    request_id: str | None
+    at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+
+
+@dataclass
+class SlowStatement:
+    sql: str
+    calls: int = 0
+    total_ms: float = 0.0
+    max_ms: float = 0.0
+    slowest: SlowQuery | None = None
+    last: SlowQuery | None = None
+    plan: str | None = None
+
+
+class SlowQueryLog:
+    """
+    进程内的慢查询聚合表
+    """
+
+    def __init__(self, max_statements: int) -> None:
+        self.max_statements = max_statements
+        # 执行 EXPLAIN 的引擎, 为 None 时不记录执行计划
+        self.explain_engine: Engine | None = None
+        self._statements: dict[str, SlowStatement] = {}
+        # 已提交 EXPLAIN 但尚未完成的语句
+        self._explaining: set[str] = set()
+        self._lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+
+    def instrument(self, engine: Engine | AsyncEngine) -> None:
+        """
+        为引擎注册计时事件
+        """
+        if isinstance(engine, AsyncEngine):
+            engine = engine.sync_engine
+        event.listen(engine, "before_cursor_execute", self._before, named=True)
+        event.listen(engine, "after_cursor_execute", self._after, named=True)
+
+    def _before(self, **kw: Any) -> None:
+        context = kw["context"]
+        if context is not None and settings.DB_SLOW_QUERY_MS:
+            context._slow_query_start = time.perf_counter()
+
+    def _after(self, **kw: Any) -> None:
+        context = kw["context"]
+        start = getattr(context, "_slow_query_start", None)
+        if start is None or not context.execution_options.get("slow_query_log", True):
+            return
+        parameters = kw["parameters"]
+        if kw["executemany"]:
+            parameters = parameters[0] if parameters else None
+        self.observe(kw["statement"], parameters, (time.perf_counter() - start) * 1000)
+
+    def observe(self, statement: str, parameters: Any, duration_ms: float) -> None:
+        """
+        超过 DB_SLOW_QUERY_MS 时记录. 不经过引擎事件执行的查询由调用方直接调用
+        """
+        if settings.DB_SLOW_QUERY_MS and duration_ms >= settings.DB_SLOW_QUERY_MS:
+            self.record(statement, parameters, duration_ms)
+
+    def record(self, statement: str, parameters: Any, duration_ms: float) -> None:
+        stats = current_stats()
+        query = SlowQuery(
+            duration_ms=round(duration_ms, 1),
+            parameters=redact_parameters(parameters),
+            route=stats.route if stats else None,
+            request_id=stats.request_id if stats else None,
+        )
+        sql = normalize_sql(statement)
+        logger.warning(
+            f"Slow query ({query.duration_ms} ms) route={query.route} "
+            f"request_id={query.request_id}: {sql[:500]} "
+            f"parameters={query.parameters}"
+        )
+        with self._lock:
+            entry = self._statements.get(sql)
+            if entry is None:
+                if len(self._statements) >= self.max_statements > 0:
+                    evicted = min(self._statements.values(), key=lambda s: s.total_ms)
+                    del self._statements[evicted.sql]
+                entry = self._statements[sql] = SlowStatement(sql=sql)
+            entry.calls += 1
+            entry.total_ms = round(entry.total_ms + query.duration_ms, 1)
+            if query.duration_ms >= entry.max_ms:
+                entry.max_ms = query.duration_ms
+                entry.slowest = query
+            entry.last = query
+            explain = (
+                settings.DB_SLOW_QUERY_EXPLAIN
+                and self.explain_engine is not None
+                and entry.plan is None
+                and sql not in self._explaining
+                and _EXPLAINABLE.match(statement) is not None
+            )
+            if explain:
+                self._explaining.add(sql)
+                if self._executor is None:
+                    self._executor = ThreadPoolExecutor(
+                        max_workers=1, thread_name_prefix="slow-query-explain"
+                    )
+                # 原始参数只在 EXPLAIN 完成之前保留
+                self._executor.submit(self._explain, sql, statement, parameters)
+
+    def _explain(self, sql: str, statement: str, parameters: Any) -> None:
+        assert self.explain_engine is not None
+        try:
+            with self.explain_engine.connect() as connection:
+                rows = (
+                    connection.execution_options(slow_query_log=False)
+                    .exec_driver_sql(f"EXPLAIN {statement}", parameters)
+                    .all()
+                )
+            plan = "\n".join(" ".join(str(value) for value in row) for row in rows)
+        except Exception as e:
+            plan = f"EXPLAIN failed: {e}"
+        with self._lock:
+            self._explaining.discard(sql)
+            if sql in self._statements:
+                self._statements[sql].plan = plan[:MAX_TEXT_LENGTH]
+
+    def top(self, limit: int, sort: SortKey = "total") -> list[SlowStatement]:
+        """
+        按总耗时或最大耗时排序的前 limit 项 (快照)
+        """
+        attr = "total_ms" if sort == "total" else "max_ms"
+        with self._lock:
+            statements = sorted(
+                self._statements.values(), key=lambda s: getattr(s, attr), reverse=True
+            )
+            return [replace(s) for s in statements[:limit]]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._statements.clear()
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+slow_query_log = SlowQueryLog(max_statements=settings.DB_SLOW_QUERY_MAX_STATEMENTS)
@@ -0,0 +1,226 @@
+"""
+登录限流
+
+按账号和 IP 统计滑动窗口内的失败次数, 超限后指数退避锁定,
+在进行任何密码哈希计算之前拒绝请求
+"""
+
+import json
+import math
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field
+from functools import partial
+from pathlib import Path
+
+from app.common import RateLimitException
+from app.core.config import settings
+from app.core.shared_sqlite import SharedSQLite, default_store_path
+
+
+@dataclass
+class ThrottleState:
+    failures: list[float] = field(default_factory=list)
+    locked_until: float = 0.0
+    strikes: int = 0
+
+
+class ThrottleStore(ABC):
+    """
+    限流计数存储
+
+    实现需要保证 update 是原子的读-改-写操作
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> ThrottleState | None: ...
+
+    @abstractmethod
+    def update(
+        self, key: str, fn: Callable[[ThrottleState], None]
+    ) -> ThrottleState: ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None: ...
+
+    @abstractmethod
+    def clear(self) -> None: ...
+
+
+class MemoryThrottleStore(ThrottleStore):
+    """单进程内存存储, 用于测试和单进程部署"""
+
+    def __init__(self) -> None:
+        self._data: dict[str, ThrottleState] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> ThrottleState | None:
+        with self._lock:
+            state = self._data.get(key)
+            return ThrottleState(**asdict(state)) if state else None
+
+    def update(self, key: str, fn: Callable[[ThrottleState], None]) -> ThrottleState:
+        with self._lock:
+            state = self._data.setdefault(key, ThrottleState())
+            fn(state)
+            return ThrottleState(**asdict(state))
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+
+class SharedMemoryThrottleStore(ThrottleStore):
+    """
+    多进程共享存储
+
+    基于放在 /dev/shm 的 SQLite 文件, uvicorn --workers 启动的各进程共用同一份计数.
+    超过 ttl 秒未更新的记录会被清理
+    """
+
+    def __init__(self, path: Path | str, ttl: float) -> None:
+        self.ttl = ttl
+        self._db = SharedSQLite(
+            path,
+            schema=[
+                "CREATE TABLE IF NOT EXISTS throttle "
+                "(key TEXT PRIMARY KEY, state TEXT NOT NULL, updated_at REAL NOT NULL)",
+                "CREATE INDEX IF NOT EXISTS ix_throttle_updated_at "
+                "ON throttle (updated_at)",
+            ],
+        )
+
+    def get(self, key: str) -> ThrottleState | None:
+        with self._db.locked() as conn:
+            row = conn.execute(
+                "SELECT state FROM throttle WHERE key = ?", (key,)
+            ).fetchone()
+        return ThrottleState(**json.loads(row[0])) if row else None
+
+    def update(self, key: str, fn: Callable[[ThrottleState], None]) -> ThrottleState:
+        with self._db.locked() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                row = conn.execute(
+                    "SELECT state FROM throttle WHERE key = ?", (key,)
+                ).fetchone()
+                state = ThrottleState(**json.loads(row[0])) if row else ThrottleState()
+                fn(state)
+                now = time.time()
+                conn.execute(
+                    "INSERT OR REPLACE INTO throttle (key, state, updated_at) "
+                    "VALUES (?, ?, ?)",
+                    (key, json.dumps(asdict(state)), now),
+                )
+                if self._db.should_prune():
+                    conn.execute(
+                        "DELETE FROM throttle WHERE updated_at < ?", (now - self.ttl,)
+                    )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        return state
+
+    def delete(self, key: str) -> None:
+        with self._db.locked() as conn:
+            conn.execute("DELETE FROM throttle WHERE key = ?", (key,))
+
+    def clear(self) -> None:
+        with self._db.locked() as conn:
+            conn.execute("DELETE FROM throttle")
+
+
+class LoginThrottle:
+    """
+    登录失败限流器
+
+    每个 key 在 window 秒内失败达到上限后锁定, 连续锁定时长按 2 的幂增长
+    """
+
+    def __init__(
+        self,
+        store: ThrottleStore,
+        *,
+        window: float,
+        account_max_failures: int,
+        ip_max_failures: int,
+        lockout: float,
+        max_lockout: float,
+    ) -> None:
+        self.store = store
+        self.window = window
+        self.account_max_failures = account_max_failures
+        self.ip_max_failures = ip_max_failures
+        self.lockout = lockout
+        self.max_lockout = max_lockout
+
+    @staticmethod
+    def keys(*, scope: str, account: str, ip: str | None) -> list[str]:
+        keys = [f"{scope}:account:{account.strip().lower()}"]
+        if ip:
+            keys.append(f"{scope}:ip:{ip}")
+        return keys
+
+    def _limit(self, key: str) -> int:
+        return self.ip_max_failures if ":ip:" in key else self.account_max_failures
+
+    def check(self, keys: list[str]) -> None:
+        """
+        锁定中的 key 直接抛出 RateLimitException
+        """
+        if not settings.LOGIN_THROTTLE_ENABLED:
+            return
+        now = time.time()
+        retry_after = 0.0
+        for key in keys:
+            state = self.store.get(key)
+            if state and state.locked_until > now:
+                retry_after = max(retry_after, state.locked_until - now)
+        if retry_after:
+            raise RateLimitException(retry_after=math.ceil(retry_after))
+
+    def _apply_failure(self, state: ThrottleState, now: float, limit: int) -> None:
+        if state.locked_until and state.locked_until + self.max_lockout < now:
+            # 长时间没有再被锁定, 退避等级清零
+            state.strikes = 0
+        state.failures = [t for t in state.failures if t > now - self.window]
+        state.failures.append(now)
+        if len(state.failures) >= limit:
+            duration = min(self.lockout * 2**state.strikes, self.max_lockout)
+            state.locked_until = now + duration
+            state.strikes += 1
+            state.failures = []
+
+    def record_failure(self, keys: list[str]) -> None:
+        if not settings.LOGIN_THROTTLE_ENABLED:
+            return
+        now = time.time()
+        for key in keys:
+            self.store.update(
+                key, partial(self._apply_failure, now=now, limit=self._limit(key))
+            )
+
+    def reset(self, keys: list[str]) -> None:
+        for key in keys:
+            self.store.delete(key)
+
+
+login_throttle = LoginThrottle(
+    SharedMemoryThrottleStore(
+        settings.LOGIN_THROTTLE_STORE_PATH or default_store_path("login-throttle"),
+        ttl=settings.LOGIN_THROTTLE_WINDOW_SECONDS
+        + settings.LOGIN_THROTTLE_MAX_LOCKOUT_SECONDS,
+    ),
+    window=settings.LOGIN_THROTTLE_WINDOW_SECONDS,
+    account_max_failures=settings.LOGIN_THROTTLE_ACCOUNT_MAX_FAILURES,
+    ip_max_failures=settings.LOGIN_THROTTLE_IP_MAX_FAILURES,
+    lockout=settings.LOGIN_THROTTLE_LOCKOUT_SECONDS,
+    max_lockout=settings.LOGIN_THROTTLE_MAX_LOCKOUT_SECONDS,
+)
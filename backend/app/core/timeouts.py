@@ -0,0 +1,70 @@
+"""
+语句超时
+
+连接默认的 statement_timeout 为 DB_STATEMENT_TIMEOUT_MS, 在建立连接时设置, 不增加查询.
+DB_ROUTE_STATEMENT_TIMEOUTS_MS 可以按路由 (operation id, 如 items-read_items) 调整,
+客户端也可以通过 X-Request-Deadline 请求头 (剩余的毫秒数) 进一步缩短.
+与默认值不同时, 请求的 session 在每个事务开始时执行一次 SET LOCAL.
+
+超时的语句被 Postgres 取消 (QueryCanceled), 由依赖转换为 503, 连接随即归还连接池
+"""
+
+from typing import Any
+
+from sqlalchemy import event, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.orm import Session
+
+from app.common import BusinessCode, DatabaseException
+from app.core.config import settings
+
+DEADLINE_HEADER = "X-Request-Deadline"
+
+
+class InvalidDeadline(ValueError):
+    pass
+
+
+def statement_timeout(route_id: str | None, deadline: str | None) -> int | None:
+    """
+    请求的超时毫秒数, 与连接默认值相同时返回 None
+    """
+    default = settings.DB_STATEMENT_TIMEOUT_MS
+    timeout = default
+    if route_id is not None:
+        timeout = settings.DB_ROUTE_STATEMENT_TIMEOUTS_MS.get(route_id, default)
+    if deadline is not None:
+        try:
+            remaining = int(deadline)
+        except ValueError:
+            raise InvalidDeadline(f"Invalid {DEADLINE_HEADER} header")
+        # 已经过期的请求也用最短的超时执行, 第一条语句就会失败. 0 在 Postgres 中表示不限制
+        remaining = max(remaining, 1)
+        timeout = min(timeout, remaining) if timeout else remaining
+    return None if timeout == default else timeout
+
+
+def set_statement_timeout(session: Session, timeout_ms: int) -> None:
+    """
+    在 session 的每个事务开始时设置 statement_timeout, 只在该事务内有效
+    """
+
+    @event.listens_for(session, "after_begin")
+    def _set_local(_session: Session, _transaction: Any, connection: Any) -> None:
+        connection.execute(
+            text("SELECT set_config('statement_timeout', :timeout, true)"),
+            {"timeout": f"{timeout_ms}ms"},
+        )
+
+
+def is_query_canceled(e: DBAPIError) -> bool:
+    return getattr(e.orig, "sqlstate", None) == "57014"
+
+
+def statement_timeout_exception(timeout_ms: int | None) -> DatabaseException:
+    timeout = timeout_ms or settings.DB_STATEMENT_TIMEOUT_MS
+    return DatabaseException(
+        code=BusinessCode.SERVICE_UNAVAILABLE,
+        message="数据库查询超时",
+        detail=f"Statement timeout of {timeout} ms exceeded" if timeout else None,
+    )
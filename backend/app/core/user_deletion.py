@@ -0,0 +1,115 @@
+"""
+用户删除任务
+
+用户立即被停用, 其名下的 item 按 USER_DELETE_BATCH_SIZE 分批删除, 每批一个事务,
+避免一个大事务长时间持有行锁. 第一批在请求中完成, 还有剩余时转入后台任务.
+全部删除后再删除用户本身, 整个过程不会把 items 关系加载到内存中.
+
+任务记录只保存在当前进程内, 只能在处理删除请求的 worker 上查询.
+进程退出导致任务中断时, 用户保持停用状态, 再次发起删除即可继续
+"""
+
+import asyncio
+import logging
+import uuid
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Literal
+
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import crud
+from app.core.config import settings
+from app.core.db import new_async_session
+
+logger = logging.getLogger(__name__)
+
+JobStatus = Literal["running", "completed", "failed"]
+
+
+@dataclass
+class DeletionJob:
+    id: uuid.UUID
+    user_id: uuid.UUID
+    status: JobStatus = "running"
+    deleted_items: int = 0
+    batches: int = 0
+    error: str | None = None
+    started_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: datetime | None = None
+
+
+class UserDeletions:
+    """
+    进程内的删除任务表, 保留进行中的任务和最近 max_finished 个已结束的任务
+    """
+
+    def __init__(self, max_finished: int = 100) -> None:
+        self.max_finished = max_finished
+        self._jobs: OrderedDict[uuid.UUID, DeletionJob] = OrderedDict()
+        # 持有任务的引用, 避免运行中的任务被回收
+        self._tasks: set[asyncio.Task[None]] = set()
+
+    def get(self, job_id: uuid.UUID) -> DeletionJob | None:
+        return self._jobs.get(job_id)
+
+    async def delete_user(
+        self, session: AsyncSession, user_id: uuid.UUID
+    ) -> DeletionJob:
+        """
+        停用用户并删除第一批 item; 没有删完时在后台继续, 返回的任务状态为 running
+        """
+        await crud.deactivate_user_async(session=session, user_id=user_id)
+        job = DeletionJob(id=uuid.uuid4(), user_id=user_id)
+        self._add(job)
+        if not await self._delete_batch(session, job):
+            task = asyncio.create_task(self._run(job))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+        return job
+
+    def _add(self, job: DeletionJob) -> None:
+        self._jobs[job.id] = job
+        finished = [j.id for j in self._jobs.values() if j.status != "running"]
+        for job_id in finished[: max(len(finished) - self.max_finished, 0)]:
+            del self._jobs[job_id]
+
+    async def _delete_batch(self, session: AsyncSession, job: DeletionJob) -> bool:
+        """
+        删除一批 item, 已全部删除时删除用户并返回 True
+        """
+        batch_size = settings.USER_DELETE_BATCH_SIZE
+        deleted = await crud.delete_user_items_batch_async(
+            session=session, user_id=job.user_id, limit=batch_size
+        )
+        job.deleted_items += deleted
+        job.batches += 1
+        if deleted == batch_size:
+            return False
+        await crud.delete_user_row_async(session=session, user_id=job.user_id)
+        job.status = "completed"
+        job.finished_at = datetime.now(timezone.utc)
+        return True
+
+    async def _run(self, job: DeletionJob) -> None:
+        try:
+            async with new_async_session() as session:
+                while not await self._delete_batch(session, job):
+                    logger.info(
+                        f"Deleting user {job.user_id}: {job.deleted_items} items "
+                        f"deleted in {job.batches} batches"
+                    )
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            job.finished_at = datetime.now(timezone.utc)
+            logger.exception(f"Deleting user {job.user_id} failed")
+        else:
+            logger.info(
+                f"Deleted user {job.user_id} and {job.deleted_items} items "
+                f"in {job.batches} batches"
+            )
+
+
+user_deletions = UserDeletions()
@@ -0,0 +1,223 @@
+"""
+用户批量导入
+
+逐行解析上传的 CSV / NDJSON, 不把整个文件读入内存. 每 USER_IMPORT_CHUNK_SIZE 行
+为一批: 一次查询找出已存在的邮箱, 在密码哈希进程池中并行哈希, 再用 COPY 写入.
+每批单独提交, 中途失败时已提交的批次保留
+"""
+
+import codecs
+import csv
+import json
+import logging
+import uuid
+from collections.abc import AsyncIterable, AsyncIterator, Callable
+from typing import Any, Literal
+
+from pydantic import TypeAdapter, ValidationError
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+from app import crud
+from app.common import BatchOperationResult
+from app.core.config import settings
+from app.core.hashing import PasswordHasher, password_hasher
+from app.models import UserCreate
+
+logger = logging.getLogger(__name__)
+
+ImportFormat = Literal["csv", "ndjson"]
+
+# (行号, 记录, 解析错误)
+Record = tuple[int, dict[str, Any] | None, str | None]
+
+user_create_adapter = TypeAdapter(UserCreate)
+
+EMAIL_EXISTS = "The user with this email already exists in the system."
+
+
+def import_format(content_type: str) -> ImportFormat | None:
+    """
+    根据 Content-Type 判断上传格式, 不支持时返回 None
+    """
+    media_type = content_type.split(";")[0].strip().lower()
+    if media_type in ("text/csv", "application/csv"):
+        return "csv"
+    if media_type in ("application/x-ndjson", "application/jsonl"):
+        return "ndjson"
+    return None
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """
+    把 UTF-8 字节流切分为文本行, 兼容 BOM 和 CRLF
+    """
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    buffer = ""
+    async for chunk in chunks:
+        buffer += decoder.decode(chunk)
+        *lines, buffer = buffer.split("\n")
+        for line in lines:
+            yield line.rstrip("\r")
+    buffer += decoder.decode(b"", final=True)
+    if buffer:
+        yield buffer.rstrip("\r")
+
+
+async def iter_records(
+    lines: AsyncIterable[str], fmt: ImportFormat
+) -> AsyncIterator[Record]:
+    """
+    逐行解析记录, 跳过空行. CSV 的第一行为表头, 字段值不支持换行;
+    CSV 中的空字段视为未填写, 使用默认值
+    """
+    header: list[str] | None = None
+    line_no = 0
+    async for line in lines:
+        line_no += 1
+        if not line.strip():
+            continue
+        if fmt == "ndjson":
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError as e:
+                yield line_no, None, f"Invalid JSON: {e.msg}"
+                continue
+            if not isinstance(record, dict):
+                yield line_no, None, "Expected a JSON object"
+                continue
+            yield line_no, record, None
+            continue
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+        if len(values) != len(header):
+            yield line_no, None, f"Expected {len(header)} columns, got {len(values)}"
+            continue
+        yield (
+            line_no,
+            {k: v for k, v in zip(header, values, strict=True) if v != ""},
+            None,
+        )
+
+
+class UserImport:
+    """
+    一次导入的状态, 累计总数与失败项
+    """
+
+    def __init__(
+        self, session: AsyncSession, hasher: PasswordHasher = password_hasher
+    ) -> None:
+        self.session = session
+        self.hasher = hasher
+        self.total = 0
+        self.failed: list[dict[str, Any]] = []
+        # 上传中已出现的邮箱, 用于发现文件内的重复
+        self._seen: set[str] = set()
+        self._chunk: list[tuple[int, UserCreate]] = []
+
+    def result(self) -> BatchOperationResult:
+        return BatchOperationResult(
+            total=self.total,
+            success_count=self.total - len(self.failed),
+            failed_count=len(self.failed),
+            failed_items=self.failed or None,
+        )
+
+    def _fail(self, line: int, error: str, email: str | None = None) -> None:
+        failure: dict[str, Any] = {"line": line, "error": error}
+        if email is not None:
+            failure["email"] = email
+        self.failed.append(failure)
+
+    async def add(self, record: Record) -> bool:
+        """
+        加入一条记录, 攒满一批时写入数据库并返回 True
+        """
+        line, data, error = record
+        self.total += 1
+        if error is not None:
+            self._fail(line, error)
+            return False
+        try:
+            user_in = user_create_adapter.validate_python(data)
+        except ValidationError as e:
+            self._fail(
+                line,
+                "; ".join(
+                    f"{'.'.join(map(str, err['loc'])) or 'record'}: {err['msg']}"
+                    for err in e.errors()
+                ),
+            )
+            return False
+        if user_in.email in self._seen:
+            self._fail(line, "Duplicate email in upload", user_in.email)
+            return False
+        self._seen.add(user_in.email)
+        self._chunk.append((line, user_in))
+        if len(self._chunk) < settings.USER_IMPORT_CHUNK_SIZE:
+            return False
+        await self.flush()
+        return True
+
+    async def flush(self) -> None:
+        """
+        写入当前这一批并提交
+        """
+        chunk, self._chunk = self._chunk, []
+        if not chunk:
+            return
+        existing = await crud.get_existing_emails_async(
+            session=self.session, emails=[user_in.email for _, user_in in chunk]
+        )
+        new = []
+        for line, user_in in chunk:
+            if user_in.email in existing:
+                self._fail(line, EMAIL_EXISTS, user_in.email)
+            else:
+                new.append((line, user_in))
+        hashes = await self.hasher.hash_many([user_in.password for _, user_in in new])
+        rows = [
+            (
+                uuid.uuid4(),
+                user_in.email,
+                hashed_password,
+                user_in.full_name,
+                user_in.is_active,
+                user_in.is_superuser,
+            )
+            for (_, user_in), hashed_password in zip(new, hashes, strict=True)
+        ]
+        inserted = await crud.copy_users_async(session=self.session, rows=rows)
+        await self.session.commit()
+        # 查询之后被并发写入的邮箱
+        for line, user_in in new:
+            if user_in.email not in inserted:
+                self._fail(line, EMAIL_EXISTS, user_in.email)
+
+
+async def import_users(
+    session: AsyncSession,
+    records: AsyncIterable[Record],
+    on_progress: Callable[[BatchOperationResult], None] | None = None,
+    hasher: PasswordHasher = password_hasher,
+) -> BatchOperationResult:
+    """
+    导入全部记录, 每提交一批调用一次 on_progress
+    """
+    user_import = UserImport(session, hasher)
+    async for record in records:
+        if await user_import.add(record):
+            progress = user_import.result()
+            logger.info(
+                f"User import: {progress.total} processed, "
+                f"{progress.failed_count} failed"
+            )
+            if on_progress is not None:
+                on_progress(progress)
+    await user_import.flush()
+    result = user_import.result()
+    if on_progress is not None:
+        on_progress(result)
+    return result
@@ -1,10 +1,48 @@
 import uuid
-from typing import Any
+from collections import defaultdict
+from collections.abc import Iterator, Sequence
+from typing import Any, TypeVar
 
-from sqlmodel import Session, select
+from sqlalchemy import String, Uuid, column, insert, update, values
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.exc import IntegrityError
+from sqlmodel import Session, col, delete, func, select
+from sqlmodel.ext.asyncio.session import AsyncSession
+from sqlmodel.sql.expression import SelectOfScalar
 
-from app.core.security import get_password_hash, verify_password
-from app.models import Item, ItemCreate, User, UserCreate, UserUpdate
+from app.core.cache import principal_cache
+from app.core.hashing import password_hasher
+from app.core.security import get_password_hash, verify_and_update_password
+from app.models import (
+    Item,
+    ItemCreate,
+    ItemUpdate,
+    User,
+    UserCreate,
+    UserUpdate,
+    UserUpdateMe,
+    normalize_email,
+)
+
+T = TypeVar("T")
+
+# Rows per statement for bulk writes, keeps bind parameters well below the
+# Postgres limit of 65535 per statement
+BATCH_CHUNK_SIZE = 1000
+
+
+def chunked(rows: Sequence[T], size: int = BATCH_CHUNK_SIZE) -> Iterator[Sequence[T]]:
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
+
+
+def select_user_by_email(email: str) -> SelectOfScalar[User]:
+    # Case-insensitive, served by the ix_user_email_lower index
+    return select(User).where(func.lower(User.email) == normalize_email(email))
+
+
+def is_unique_violation(e: IntegrityError) -> bool:
+    return getattr(e.orig, "sqlstate", None) == "23505"
 
 
 def create_user(*, session: Session, user_create: UserCreate) -> User:
@@ -27,13 +65,13 @@ def update_user(*, session: Session, db_user: User, user_in: UserUpdate) -> Any:
     db_user.sqlmodel_update(user_data, update=extra_data)
     session.add(db_user)
     session.commit()
+    principal_cache.invalidate(db_user.id)
     session.refresh(db_user)
     return db_user
 
 
 def get_user_by_email(*, session: Session, email: str) -> User | None:
-    statement = select(User).where(User.email == email)
-    session_user = session.exec(statement).first()
+    session_user = session.exec(select_user_by_email(email)).first()
     return session_user
 
 
@@ -41,14 +79,307 @@ def authenticate(*, session: Session, email: str, password: str) -> User | None:
     db_user = get_user_by_email(session=session, email=email)
     if not db_user:
         return None
-    if not verify_password(password, db_user.hashed_password):
+    verified, new_hash = verify_and_update_password(password, db_user.hashed_password)
+    if not verified:
         return None
+    if new_hash:
+        # Stored hash uses outdated parameters, upgrade it transparently
+        db_user.hashed_password = new_hash
+        session.add(db_user)
+        session.commit()
+        principal_cache.invalidate(db_user.id)
+        session.refresh(db_user)
     return db_user
 
 
+def insert_item_statement(item_in: ItemCreate, owner_id: uuid.UUID) -> Any:
+    # INSERT ... RETURNING loads the new row, no refresh SELECT needed
+    return (
+        insert(Item)
+        .values(id=uuid.uuid4(), owner_id=owner_id, **item_in.model_dump())
+        .returning(Item)
+    )
+
+
 def create_item(*, session: Session, item_in: ItemCreate, owner_id: uuid.UUID) -> Item:
-    db_item = Item.model_validate(item_in, update={"owner_id": owner_id})
-    session.add(db_item)
+    statement = insert_item_statement(item_in, owner_id)
+    db_item: Item = session.exec(statement).scalar_one()
     session.commit()
-    session.refresh(db_item)
     return db_item
+
+
+# Async versions for AsyncSession, password hashing runs in the hasher pool
+
+
+async def create_user_async(
+    *, session: AsyncSession, user_create: UserCreate
+) -> User | None:
+    """
+    Insert a user with a single INSERT ... ON CONFLICT DO NOTHING RETURNING.
+    Returns None when the email is already taken.
+    """
+    hashed_password = await password_hasher.hash(user_create.password)
+    db_obj = User.model_validate(
+        user_create, update={"hashed_password": hashed_password}
+    )
+    statement = (
+        pg_insert(User)
+        .values(**db_obj.model_dump())
+        .on_conflict_do_nothing(index_elements=[func.lower(User.email)])
+        .returning(User)
+    )
+    result = await session.exec(statement)  # type: ignore
+    db_user: User | None = result.scalar_one_or_none()
+    if db_user is not None:
+        await session.commit()
+    return db_user
+
+
+async def update_user_async(
+    *, session: AsyncSession, db_user: User, user_in: UserUpdate | UserUpdateMe
+) -> User | None:
+    """
+    Returns None, with nothing changed, when the new email is already taken.
+    """
+    user_data = user_in.model_dump(exclude_unset=True)
+    extra_data = {}
+    if "password" in user_data:
+        extra_data["hashed_password"] = await password_hasher.hash(
+            user_data["password"]
+        )
+    db_user.sqlmodel_update(user_data, update=extra_data)
+    session.add(db_user)
+    try:
+        await session.commit()
+    except IntegrityError as e:
+        if not is_unique_violation(e):
+            raise
+        await session.rollback()
+        return None
+    principal_cache.invalidate(db_user.id)
+    await session.refresh(db_user)
+    return db_user
+
+
+async def get_user_by_email_async(*, session: AsyncSession, email: str) -> User | None:
+    session_user = (await session.exec(select_user_by_email(email))).first()
+    return session_user
+
+
+async def authenticate_async(
+    *, session: AsyncSession, email: str, password: str
+) -> User | None:
+    db_user = await get_user_by_email_async(session=session, email=email)
+    if not db_user:
+        return None
+    verified, new_hash = await password_hasher.verify_and_update(
+        password, db_user.hashed_password
+    )
+    if not verified:
+        return None
+    if new_hash:
+        # Stored hash uses outdated parameters, upgrade it transparently
+        db_user.hashed_password = new_hash
+        session.add(db_user)
+        await session.commit()
+        principal_cache.invalidate(db_user.id)
+        await session.refresh(db_user)
+    return db_user
+
+
+async def deactivate_user_async(*, session: AsyncSession, user_id: uuid.UUID) -> None:
+    statement = update(User).where(col(User.id) == user_id).values(is_active=False)
+    await session.exec(statement)  # type: ignore
+    await session.commit()
+    principal_cache.invalidate(user_id)
+
+
+async def delete_user_items_batch_async(
+    *, session: AsyncSession, user_id: uuid.UUID, limit: int
+) -> int:
+    """
+    Delete up to limit items of the user and commit. Returns how many were
+    deleted.
+    """
+    batch = select(Item.id).where(Item.owner_id == user_id).limit(limit)
+    statement = (
+        delete(Item)
+        .where(col(Item.id).in_(batch.scalar_subquery()))
+        .execution_options(synchronize_session=False)
+    )
+    result = await session.exec(statement)  # type: ignore
+    await session.commit()
+    return int(result.rowcount)
+
+
+async def delete_user_row_async(*, session: AsyncSession, user_id: uuid.UUID) -> None:
+    # Core DELETE, the items relationship is never loaded
+    statement = delete(User).where(col(User.id) == user_id)
+    await session.exec(statement)  # type: ignore
+    await session.commit()
+    principal_cache.invalidate(user_id)
+
+
+async def get_existing_emails_async(
+    *, session: AsyncSession, emails: Sequence[str]
+) -> set[str]:
+    statement = select(func.lower(User.email)).where(
+        func.lower(User.email).in_([normalize_email(email) for email in emails])
+    )
+    return set((await session.exec(statement)).all())
+
+
+USER_COPY_COLUMNS = (
+    "id",
+    "email",
+    "hashed_password",
+    "full_name",
+    "is_active",
+    "is_superuser",
+)
+
+
+async def copy_users_async(
+    *, session: AsyncSession, rows: Sequence[tuple[Any, ...]]
+) -> set[str]:
+    """
+    COPY users (in USER_COPY_COLUMNS order) into a temporary table and move
+    them into "user", skipping any that conflict with an existing one.
+    Returns the emails that were inserted. Does not commit.
+    """
+    connection = await session.connection()
+    raw_connection = await connection.get_raw_connection()
+    # psycopg AsyncConnection, COPY is not exposed through SQLAlchemy
+    driver_connection = raw_connection.driver_connection
+    assert driver_connection is not None
+    columns = ", ".join(USER_COPY_COLUMNS)
+    async with driver_connection.cursor() as cursor:
+        await cursor.execute(
+            'CREATE TEMP TABLE user_import (LIKE "user" INCLUDING DEFAULTS) '
+            "ON COMMIT DROP"
+        )
+        async with cursor.copy(f"COPY user_import ({columns}) FROM STDIN") as copy:
+            for row in rows:
+                await copy.write_row(row)
+        await cursor.execute(
+            f'INSERT INTO "user" ({columns}) SELECT {columns} FROM user_import '
+            "ON CONFLICT (lower(email)) DO NOTHING RETURNING email"
+        )
+        return {email for (email,) in await cursor.fetchall()}
+
+
+async def create_item_async(
+    *, session: AsyncSession, item_in: ItemCreate, owner_id: uuid.UUID
+) -> Item:
+    statement = insert_item_statement(item_in, owner_id)
+    db_item: Item = (await session.exec(statement)).scalar_one()
+    await session.commit()
+    return db_item
+
+
+def filter_item(statement: Any, item_id: uuid.UUID, owner_id: uuid.UUID | None) -> Any:
+    statement = statement.where(col(Item.id) == item_id)
+    if owner_id is not None:
+        statement = statement.where(col(Item.owner_id) == owner_id)
+    return statement
+
+
+async def update_item_async(
+    *,
+    session: AsyncSession,
+    item_id: uuid.UUID,
+    item_in: ItemUpdate,
+    owner_id: uuid.UUID | None = None,
+) -> Item | None:
+    """
+    Update an item with a single UPDATE ... RETURNING. With owner_id set,
+    only an item of that user matches. Returns None when nothing matched.
+    """
+    update_data = item_in.model_dump(exclude_unset=True)
+    if not update_data:
+        statement = filter_item(select(Item), item_id, owner_id)
+        db_item: Item | None = (await session.exec(statement)).first()
+        return db_item
+    statement = filter_item(update(Item), item_id, owner_id)
+    statement = statement.values(**update_data).returning(Item)
+    db_item = (await session.exec(statement)).scalar_one_or_none()
+    if db_item is not None:
+        await session.commit()
+    return db_item
+
+
+async def delete_item_async(
+    *, session: AsyncSession, item_id: uuid.UUID, owner_id: uuid.UUID | None = None
+) -> bool:
+    """
+    Delete an item with a single DELETE ... RETURNING, see update_item_async.
+    Returns whether an item was deleted.
+    """
+    statement = filter_item(delete(Item), item_id, owner_id).returning(col(Item.id))
+    deleted = (await session.exec(statement)).first() is not None
+    if deleted:
+        await session.commit()
+    return deleted
+
+
+async def get_item_owners_async(
+    *, session: AsyncSession, ids: Sequence[uuid.UUID]
+) -> dict[uuid.UUID, uuid.UUID]:
+    """
+    Map the existing ids among the given ones to their owner id.
+    """
+    owners: dict[uuid.UUID, uuid.UUID] = {}
+    for chunk in chunked(ids):
+        statement = select(Item.id, Item.owner_id).where(col(Item.id).in_(chunk))
+        owners.update((await session.exec(statement)).all())
+    return owners
+
+
+async def create_items_async(
+    *, session: AsyncSession, items_in: Sequence[ItemCreate], owner_id: uuid.UUID
+) -> None:
+    rows = [
+        {"id": uuid.uuid4(), "owner_id": owner_id, **item_in.model_dump()}
+        for item_in in items_in
+    ]
+    if rows:
+        # executemany of a Core insert is sent as multi-row INSERT statements
+        await session.exec(insert(Item), params=rows)  # type: ignore
+    await session.commit()
+
+
+async def update_items_async(
+    *, session: AsyncSession, updates: dict[uuid.UUID, dict[str, Any]]
+) -> None:
+    """
+    Apply partial updates, one UPDATE ... FROM (VALUES ...) per chunk of
+    items that set the same fields.
+    """
+    groups: dict[tuple[str, ...], list[tuple[Any, ...]]] = defaultdict(list)
+    for item_id, data in updates.items():
+        fields = tuple(sorted(data))
+        if fields:
+            groups[fields].append((item_id, *(data[field] for field in fields)))
+    for fields, rows in groups.items():
+        for chunk in chunked(rows):
+            new_values = values(
+                column("id", Uuid()),
+                *(column(field, String()) for field in fields),
+                name="new_values",
+            ).data(list(chunk))
+            statement = (
+                update(Item)
+                .where(col(Item.id) == new_values.c.id)
+                .values({field: new_values.c[field] for field in fields})
+            )
+            await session.exec(statement)  # type: ignore
+    await session.commit()
+
+
+async def delete_items_async(
+    *, session: AsyncSession, ids: Sequence[uuid.UUID]
+) -> None:
+    for chunk in chunked(ids):
+        statement = delete(Item).where(col(Item.id).in_(chunk))
+        await session.exec(statement)  # type: ignore
+    await session.commit()
@@ -0,0 +1,74 @@
+import argparse
+import asyncio
+import logging
+import os
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+from app.common import BatchOperationResult
+from app.core import user_import
+from app.core.db import async_engine, new_async_session
+from app.core.hashing import PasswordHasher
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+READ_SIZE = 64 * 1024
+
+
+async def read_file(path: Path) -> AsyncIterator[bytes]:
+    with path.open("rb") as f:
+        while chunk := await asyncio.to_thread(f.read, READ_SIZE):
+            yield chunk
+
+
+def log_progress(progress: BatchOperationResult) -> None:
+    logger.info(
+        f"{progress.total} processed, {progress.success_count} imported, "
+        f"{progress.failed_count} failed"
+    )
+
+
+async def run(path: Path, fmt: user_import.ImportFormat) -> BatchOperationResult:
+    # Nothing else hashes in this process, so use every core
+    workers = os.cpu_count() or 1
+    hasher = PasswordHasher(max_workers=workers, max_queue_size=workers)
+    try:
+        async with new_async_session() as session:
+            records = user_import.iter_records(
+                user_import.iter_lines(read_file(path)), fmt
+            )
+            return await user_import.import_users(
+                session, records, on_progress=log_progress, hasher=hasher
+            )
+    finally:
+        hasher.shutdown()
+        await async_engine.dispose()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Create users from a CSV (with a header row) or NDJSON file"
+    )
+    parser.add_argument("path", type=Path)
+    parser.add_argument(
+        "--format",
+        choices=["csv", "ndjson"],
+        help="Defaults to csv for .csv files and ndjson otherwise",
+    )
+    args = parser.parse_args()
+
+    fmt: user_import.ImportFormat = "ndjson"
+    if args.format:
+        fmt = args.format
+    elif args.path.suffix.lower() == ".csv":
+        fmt = "csv"
+    logger.info(f"Importing users from {args.path} ({fmt})")
+    result = asyncio.run(run(args.path, fmt))
+    for failure in result.failed_items or []:
+        logger.warning(f"Line {failure['line']}: {failure['error']}")
+    log_progress(result)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,23 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+
 import sentry_sdk
 from fastapi import FastAPI
+from fastapi.concurrency import run_in_threadpool
 from fastapi.routing import APIRoute
 from starlette.middleware.cors import CORSMiddleware
 
 from app.api.main import api_router
+from app.api.routes import well_known
 from app.common import register_exception_handlers
 from app.core.config import settings
+from app.core.db import async_engine, async_replica_engines, engine
+from app.core.hashing import password_hasher
+from app.core.jwt_keys import get_key_ring
+from app.core.pool import warm_up, warm_up_async
+from app.core.query_counter import QueryCounterMiddleware
+from app.core.replica import sticky_store
+from app.core.slow_queries import slow_query_log
 
 
 def custom_generate_unique_id(route: APIRoute) -> str:
@@ -15,8 +27,27 @@ def custom_generate_unique_id(route: APIRoute) -> str:
 if settings.SENTRY_DSN and settings.ENVIRONMENT != "local":
     sentry_sdk.init(dsn=str(settings.SENTRY_DSN), enable_tracing=True)
 
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI) -> AsyncIterator[None]:
+    # Parse the signing keys up front so a bad key fails at startup
+    get_key_ring()
+    if settings.DB_POOL_MIN_SIZE:
+        await run_in_threadpool(warm_up, engine, settings.DB_POOL_MIN_SIZE)
+        for db_engine in [async_engine, *async_replica_engines]:
+            await warm_up_async(db_engine, settings.DB_POOL_MIN_SIZE)
+    yield
+    password_hasher.shutdown()
+    slow_query_log.shutdown()
+    sticky_store.shutdown()
+    # Async connections belong to this event loop, don't keep them around
+    for db_engine in [async_engine, *async_replica_engines]:
+        await db_engine.dispose()
+
+
 app = FastAPI(
     title=settings.PROJECT_NAME,
+    lifespan=lifespan,
     openapi_url=f"{settings.API_V1_STR}/openapi.json",
     generate_unique_id_function=custom_generate_unique_id,
 )
@@ -31,7 +62,10 @@ if settings.all_cors_origins:
         allow_headers=["*"],
     )
 
+app.add_middleware(QueryCounterMiddleware)
+
 app.include_router(api_router, prefix=settings.API_V1_STR)
+app.include_router(well_known.router)
 
 # 注册全局异常处理器
 register_exception_handlers(app)
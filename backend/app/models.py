@@ -1,12 +1,25 @@
 import uuid
+from datetime import datetime, timezone
+from typing import Annotated
 
-from pydantic import EmailStr
+from pydantic import AfterValidator, EmailStr
+from sqlalchemy import DateTime, Index, text
 from sqlmodel import Field, Relationship, SQLModel
 
+from app.core.pagination import CountMode
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+
+# Emails are stored lowercased and unique regardless of case, see User
+NormalizedEmail = Annotated[EmailStr, AfterValidator(normalize_email)]
+
 
 # Shared properties
 class UserBase(SQLModel):
-    email: EmailStr = Field(unique=True, index=True, max_length=255)
+    email: NormalizedEmail = Field(max_length=255)
     is_active: bool = True
     is_superuser: bool = False
     full_name: str | None = Field(default=None, max_length=255)
@@ -18,20 +31,20 @@ class UserCreate(UserBase):
 
 
 class UserRegister(SQLModel):
-    email: EmailStr = Field(max_length=255)
+    email: NormalizedEmail = Field(max_length=255)
     password: str = Field(min_length=8, max_length=128)
     full_name: str | None = Field(default=None, max_length=255)
 
 
 # Properties to receive via API on update, all are optional
 class UserUpdate(UserBase):
-    email: EmailStr | None = Field(default=None, max_length=255)  # type: ignore
+    email: NormalizedEmail | None = Field(default=None, max_length=255)  # type: ignore
     password: str | None = Field(default=None, min_length=8, max_length=128)
 
 
 class UserUpdateMe(SQLModel):
     full_name: str | None = Field(default=None, max_length=255)
-    email: EmailStr | None = Field(default=None, max_length=255)
+    email: NormalizedEmail | None = Field(default=None, max_length=255)
 
 
 class UpdatePassword(SQLModel):
@@ -41,9 +54,17 @@ class UpdatePassword(SQLModel):
 
 # Database model, database table inferred from class name
 class User(UserBase, table=True):
+    # Rows from before emails were normalized may be mixed case, lookups
+    # compare lower(email) so they use this index
+    __table_args__ = (Index("ix_user_email_lower", text("lower(email)"), unique=True),)
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     hashed_password: str
-    items: list["Item"] = Relationship(back_populates="owner", cascade_delete=True)
+    # Items go with the user through ON DELETE CASCADE, the ORM never loads
+    # them for a delete, see app.core.user_deletion
+    items: list["Item"] = Relationship(
+        back_populates="owner", cascade_delete=True, passive_deletes=True
+    )
 
 
 # Properties to return via API, id is always required
@@ -53,7 +74,11 @@ class UserPublic(UserBase):
 
 class UsersPublic(SQLModel):
     data: list[UserPublic]
-    count: int
+    # Exact, estimated or omitted total, as requested with ?count=
+    count: int | None
+    count_type: CountMode = "exact"
+    # Pass as cursor to get the next page, None on the last page
+    next_cursor: str | None = None
 
 
 # Shared properties
@@ -72,8 +97,16 @@ class ItemUpdate(ItemBase):
     title: str | None = Field(default=None, min_length=1, max_length=255)  # type: ignore
 
 
+# One entry of a batch item update
+class ItemBatchUpdate(ItemUpdate):
+    id: uuid.UUID
+
+
 # Database model, database table inferred from class name
 class Item(ItemBase, table=True):
+    # Owner-scoped listings, counts and deletes, in primary key order
+    __table_args__ = (Index("ix_item_owner_id_id", "owner_id", "id"),)
+
     id: uuid.UUID = Field(default_factory=uuid.uuid4, primary_key=True)
     owner_id: uuid.UUID = Field(
         foreign_key="user.id", nullable=False, ondelete="CASCADE"
@@ -89,7 +122,11 @@ class ItemPublic(ItemBase):
 
 class ItemsPublic(SQLModel):
     data: list[ItemPublic]
-    count: int
+    # Exact, estimated or omitted total, as requested with ?count=
+    count: int | None
+    count_type: CountMode = "exact"
+    # Pass as cursor to get the next page, None on the last page
+    next_cursor: str | None = None
 
 
 # Generic message
@@ -101,11 +138,35 @@ class Message(SQLModel):
 class Token(SQLModel):
     access_token: str
     token_type: str = "bearer"
+    # Only issued in claims-only auth mode
+    refresh_token: str | None = None
+
+
+class TokenRefresh(SQLModel):
+    refresh_token: str
 
 
 # Contents of JWT token
 class TokenPayload(SQLModel):
     sub: str | None = None
+    # access, refresh or password_reset; tokens without it are rejected
+    type: str | None = None
+    jti: str | None = None
+    exp: int | None = None
+    # Authorization claims, only present on claims-only access tokens
+    is_active: bool | None = None
+    is_superuser: bool | None = None
+
+
+# Revoked JWT ids, kept until the token would have expired anyway
+class RevokedToken(SQLModel, table=True):
+    jti: uuid.UUID = Field(primary_key=True)
+    expires_at: datetime = Field(sa_type=DateTime(timezone=True), index=True)  # type: ignore
+    revoked_at: datetime = Field(
+        default_factory=lambda: datetime.now(timezone.utc),
+        sa_type=DateTime(timezone=True),  # type: ignore
+        index=True,
+    )
 
 
 class NewPassword(SQLModel):
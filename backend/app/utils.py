@@ -5,7 +5,6 @@ from pathlib import Path
 from typing import Any
 
 import emails  # type: ignore
-import jwt
 from jinja2 import Template
 from jwt.exceptions import InvalidTokenError
 
@@ -15,6 +14,9 @@ from app.core.config import settings
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# "type" claim of password reset tokens, which share the access token keys
+PASSWORD_RESET_TOKEN_TYPE = "password_reset"
+
 
 @dataclass
 class EmailData:
@@ -105,19 +107,17 @@ def generate_password_reset_token(email: str) -> str:
     now = datetime.now(timezone.utc)
     expires = now + delta
     exp = expires.timestamp()
-    encoded_jwt = jwt.encode(
-        {"exp": exp, "nbf": now, "sub": email},
-        settings.SECRET_KEY,
-        algorithm=security.ALGORITHM,
+    encoded_jwt = security.encode_jwt(
+        {"exp": exp, "nbf": now, "sub": email, "type": PASSWORD_RESET_TOKEN_TYPE}
     )
     return encoded_jwt
 
 
 def verify_password_reset_token(token: str) -> str | None:
     try:
-        decoded_token = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[security.ALGORITHM]
-        )
-        return str(decoded_token["sub"])
+        decoded_token = security.decode_jwt(token)
     except InvalidTokenError:
         return None
+    if decoded_token.get("type") != PASSWORD_RESET_TOKEN_TYPE:
+        return None
+    return str(decoded_token["sub"])
@@ -1,10 +1,17 @@
+import csv
+import io
+import json
 import uuid
+from unittest.mock import patch
 
+import pytest
 from fastapi.testclient import TestClient
 from sqlmodel import Session
 
 from app.core.config import settings
+from app.core.pagination import encode_cursor
 from tests.utils.item import create_random_item
+from tests.utils.utils import random_lower_string
 
 
 def test_create_item(
@@ -79,6 +86,146 @@ def test_read_items(
     assert len(content["data"]) >= 2
 
 
+def test_read_items_with_cursor(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    for _ in range(3):
+        create_random_item(db)
+    seen: list[str] = []
+    params: dict[str, str | int] = {"limit": 2, "cursor": ""}
+    while True:
+        response = client.get(
+            f"{settings.API_V1_STR}/items/",
+            headers=superuser_token_headers,
+            params=params,
+        )
+        assert response.status_code == 200
+        content = response.json()
+        seen.extend(item["id"] for item in content["data"])
+        if content["next_cursor"] is None:
+            break
+        params["cursor"] = content["next_cursor"]
+    assert len(seen) == content["count"]
+    assert seen == sorted(seen)
+
+
+def test_read_items_count_modes(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    create_random_item(db)
+    url = f"{settings.API_V1_STR}/items/"
+    content = client.get(url, headers=superuser_token_headers).json()
+    assert content["count_type"] == "exact"
+    assert content["count"] >= 1
+
+    response = client.get(
+        url, headers=superuser_token_headers, params={"count": "none"}
+    )
+    assert response.status_code == 200
+    assert response.json()["count"] is None
+    assert response.json()["count_type"] == "none"
+
+    response = client.get(
+        url, headers=superuser_token_headers, params={"count": "estimate"}
+    )
+    assert response.status_code == 200
+    assert response.json()["count_type"] in ("exact", "estimate")
+    assert response.json()["count"] >= 0
+
+
+@pytest.mark.parametrize("mode", ["window", "pipeline", "separate"])
+def test_read_items_list_query_modes(
+    client: TestClient,
+    normal_user_token_headers: dict[str, str],
+    mode: str,
+) -> None:
+    url = f"{settings.API_V1_STR}/items/"
+    for _ in range(3):
+        client.post(url, headers=normal_user_token_headers, json={"title": "Foo"})
+    with patch("app.core.config.settings.LIST_QUERY_MODE", mode):
+        first = client.get(
+            url, headers=normal_user_token_headers, params={"limit": 2}
+        ).json()
+        assert len(first["data"]) == 2
+        assert first["count"] >= 3
+        second = client.get(
+            url,
+            headers=normal_user_token_headers,
+            params={"limit": 2, "cursor": first["next_cursor"]},
+        ).json()
+        # The total doesn't depend on the page
+        assert second["count"] == first["count"]
+        beyond = client.get(
+            url,
+            headers=normal_user_token_headers,
+            params={"skip": first["count"]},
+        ).json()
+        assert beyond["data"] == []
+        assert beyond["count"] == first["count"]
+
+
+def test_read_items_search(
+    client: TestClient,
+    normal_user_token_headers: dict[str, str],
+    superuser_token_headers: dict[str, str],
+) -> None:
+    url = f"{settings.API_V1_STR}/items/"
+    word = random_lower_string()
+    for data in [
+        {"title": "Unrelated", "description": word},
+        {"title": f"Fresh {word}", "description": "Title match"},
+        {"title": "Nothing", "description": "Not found"},
+    ]:
+        client.post(url, headers=normal_user_token_headers, json=data)
+    client.post(url, headers=superuser_token_headers, json={"title": word})
+
+    response = client.get(
+        url, headers=normal_user_token_headers, params={"search": word.upper()}
+    )
+    assert response.status_code == 200
+    content = response.json()
+    # Title matches rank first, the superuser's item isn't visible
+    assert [item["title"] for item in content["data"]] == [f"Fresh {word}", "Unrelated"]
+    assert content["count"] == 2
+    assert content["next_cursor"] is None
+
+    content = client.get(
+        url, headers=superuser_token_headers, params={"search": word, "skip": 1}
+    ).json()
+    assert len(content["data"]) == 2
+    assert content["count"] == 3
+
+    content = client.get(
+        url,
+        headers=normal_user_token_headers,
+        params={"search": f"{word} -fresh", "count": "none"},
+    ).json()
+    assert [item["title"] for item in content["data"]] == ["Unrelated"]
+    assert content["count"] is None
+
+
+def test_read_items_search_with_cursor(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/items/",
+        headers=superuser_token_headers,
+        params={"search": "foo", "cursor": encode_cursor(uuid.uuid4())},
+    )
+    assert response.status_code == 400
+
+
+def test_read_items_invalid_cursor(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    response = client.get(
+        f"{settings.API_V1_STR}/items/",
+        headers=superuser_token_headers,
+        params={"cursor": "not-a-cursor"},
+    )
+    assert response.status_code == 400
+
+
 def test_update_item(
     client: TestClient, superuser_token_headers: dict[str, str], db: Session
 ) -> None:
@@ -97,6 +244,21 @@ def test_update_item(
     assert content["owner_id"] == str(item.owner_id)
 
 
+def test_update_item_without_changes(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    item = create_random_item(db)
+    response = client.put(
+        f"{settings.API_V1_STR}/items/{item.id}",
+        headers=superuser_token_headers,
+        json={},
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["title"] == item.title
+    assert content["id"] == str(item.id)
+
+
 def test_update_item_not_found(
     client: TestClient, superuser_token_headers: dict[str, str]
 ) -> None:
@@ -162,3 +324,121 @@ def test_delete_item_not_enough_permissions(
     assert response.status_code == 400
     content = response.json()
     assert content["detail"] == "Not enough permissions"
+
+
+def test_create_items_batch(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    data = [{"title": "Foo"}, {"description": "no title"}, {"title": "Bar"}]
+    response = client.post(
+        f"{settings.API_V1_STR}/items/batch",
+        headers=normal_user_token_headers,
+        json=data,
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["total"] == 3
+    assert content["success_count"] == 2
+    assert content["failed_count"] == 1
+    assert content["failed_items"][0]["index"] == 1
+
+
+def test_update_items_batch(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    item = create_random_item(db)
+    missing_id = str(uuid.uuid4())
+    data = [
+        {"id": str(item.id), "title": "Updated"},
+        {"id": missing_id, "title": "Missing"},
+        {"id": str(item.id), "title": None},
+    ]
+    response = client.patch(
+        f"{settings.API_V1_STR}/items/batch",
+        headers=superuser_token_headers,
+        json=data,
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["success_count"] == 1
+    failures = {failure["index"]: failure for failure in content["failed_items"]}
+    assert failures[1]["error"] == "Item not found"
+    assert 2 in failures
+    db.refresh(item)
+    assert item.title == "Updated"
+
+
+def test_delete_items_batch(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    response = client.post(
+        f"{settings.API_V1_STR}/items/",
+        headers=normal_user_token_headers,
+        json={"title": "Mine"},
+    )
+    own_id = response.json()["id"]
+    other = create_random_item(db)
+    response = client.request(
+        "DELETE",
+        f"{settings.API_V1_STR}/items/batch",
+        headers=normal_user_token_headers,
+        json=[own_id, str(other.id), "not-a-uuid"],
+    )
+    assert response.status_code == 200
+    content = response.json()
+    assert content["success_count"] == 1
+    errors = [failure["error"] for failure in content["failed_items"]]
+    assert errors[0] == "Not enough permissions"
+    response = client.get(
+        f"{settings.API_V1_STR}/items/{own_id}",
+        headers=normal_user_token_headers,
+    )
+    assert response.status_code == 404
+
+
+def test_items_batch_too_large(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    data = [{"title": "Foo"}] * (settings.ITEMS_BATCH_MAX_SIZE + 1)
+    response = client.post(
+        f"{settings.API_V1_STR}/items/batch",
+        headers=superuser_token_headers,
+        json=data,
+    )
+    assert response.status_code == 413
+
+
+def test_export_items(
+    client: TestClient, normal_user_token_headers: dict[str, str], db: Session
+) -> None:
+    other = create_random_item(db)
+    response = client.post(
+        f"{settings.API_V1_STR}/items/",
+        headers=normal_user_token_headers,
+        json={"title": "Exported"},
+    )
+    own_id = response.json()["id"]
+    response = client.get(
+        f"{settings.API_V1_STR}/items/export", headers=normal_user_token_headers
+    )
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    items = [json.loads(line) for line in response.text.splitlines()]
+    ids = {item["id"] for item in items}
+    assert own_id in ids
+    assert str(other.id) not in ids
+
+
+def test_export_items_csv(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    item = create_random_item(db)
+    response = client.get(
+        f"{settings.API_V1_STR}/items/export",
+        headers=superuser_token_headers,
+        params={"format": "csv"},
+    )
+    assert response.status_code == 200
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert {"id", "title", "description", "owner_id"} <= set(rows[0])
+    assert str(item.id) in {row["id"] for row in rows}
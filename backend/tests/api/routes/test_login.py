@@ -1,13 +1,17 @@
+import ipaddress
+import random
 from unittest.mock import patch
 
+from fastapi import Request
 from fastapi.testclient import TestClient
 from sqlmodel import Session
 
+from app.api.routes.login import client_ip
 from app.core.config import settings
 from app.core.security import verify_password
 from app.crud import create_user
 from app.models import UserCreate
-from app.utils import generate_password_reset_token
+from app.utils import generate_password_reset_token, verify_password_reset_token
 from tests.utils.user import user_authentication_headers
 from tests.utils.utils import random_email, random_lower_string
 
@@ -116,3 +120,128 @@ def test_reset_password_invalid_token(
     assert "detail" in response
     assert r.status_code == 400
     assert response["detail"] == "Invalid token"
+
+
+def test_token_types_are_not_interchangeable(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    access_token = normal_user_token_headers["Authorization"].removeprefix("Bearer ")
+    assert verify_password_reset_token(access_token) is None
+    r = client.post(
+        f"{settings.API_V1_STR}/reset-password/",
+        headers=normal_user_token_headers,
+        json={"new_password": random_lower_string(), "token": access_token},
+    )
+    assert r.status_code == 400
+
+    reset_token = generate_password_reset_token(email=settings.EMAIL_TEST_USER)
+    assert verify_password_reset_token(reset_token) == settings.EMAIL_TEST_USER
+    r = client.get(
+        f"{settings.API_V1_STR}/users/me",
+        headers={"Authorization": f"Bearer {reset_token}"},
+    )
+    assert r.status_code == 403
+
+
+def test_claims_only_tokens(client: TestClient) -> None:
+    login_data = {
+        "username": settings.FIRST_SUPERUSER,
+        "password": settings.FIRST_SUPERUSER_PASSWORD,
+    }
+    with patch("app.core.config.settings.AUTH_CLAIMS_ONLY", True):
+        r = client.post(f"{settings.API_V1_STR}/login/access-token", data=login_data)
+        assert r.status_code == 200
+        tokens = r.json()
+        assert tokens["refresh_token"]
+
+        headers = {"Authorization": f"Bearer {tokens['access_token']}"}
+        r = client.get(f"{settings.API_V1_STR}/items/", headers=headers)
+        assert r.status_code == 200
+
+        r = client.post(
+            f"{settings.API_V1_STR}/login/refresh-token",
+            json={"refresh_token": tokens["refresh_token"]},
+        )
+        assert r.status_code == 200
+        assert r.json()["access_token"]
+
+        r = client.post(
+            f"{settings.API_V1_STR}/login/refresh-token",
+            json={"refresh_token": tokens["access_token"]},
+        )
+        assert r.status_code == 403
+
+        refresh_headers = {"Authorization": f"Bearer {tokens['refresh_token']}"}
+        r = client.get(f"{settings.API_V1_STR}/items/", headers=refresh_headers)
+        assert r.status_code == 403
+
+
+def test_login_throttled_after_repeated_failures(client: TestClient) -> None:
+    login_data = {"username": random_email(), "password": "incorrect"}
+    for _ in range(settings.LOGIN_THROTTLE_ACCOUNT_MAX_FAILURES):
+        r = client.post(f"{settings.API_V1_STR}/login/access-token", data=login_data)
+        assert r.status_code == 400
+    r = client.post(f"{settings.API_V1_STR}/login/access-token", data=login_data)
+    assert r.status_code == 429
+    assert int(r.headers["Retry-After"]) > 0
+
+
+def forwarded_request(peer: str, forwarded: str | None = None) -> Request:
+    headers = [] if forwarded is None else [(b"x-forwarded-for", forwarded.encode())]
+    return Request({"type": "http", "client": (peer, 50000), "headers": headers})
+
+
+def test_client_ip_behind_trusted_proxy() -> None:
+    with patch(
+        "app.core.config.settings.TRUSTED_PROXIES", ["172.16.0.0/12", "10.0.0.1"]
+    ):
+        request = forwarded_request("172.18.0.5", "198.51.100.1, 203.0.113.7, 10.0.0.1")
+        assert client_ip(request) == "203.0.113.7"
+        # Headers from untrusted peers are ignored
+        request = forwarded_request("203.0.113.9", "198.51.100.1")
+        assert client_ip(request) == "203.0.113.9"
+        assert client_ip(forwarded_request("172.18.0.5")) is None
+        assert client_ip(forwarded_request("172.18.0.5", "10.0.0.1")) is None
+    assert client_ip(forwarded_request("172.18.0.5", "203.0.113.7")) == "172.18.0.5"
+
+
+def random_ip() -> str:
+    return str(ipaddress.IPv6Address(random.getrandbits(128)))
+
+
+def test_login_throttle_uses_forwarded_ip(client: TestClient) -> None:
+    def login(forwarded: str) -> int:
+        login_data = {"username": random_email(), "password": "incorrect"}
+        r = client.post(
+            f"{settings.API_V1_STR}/login/access-token",
+            data=login_data,
+            headers={"X-Forwarded-For": forwarded},
+        )
+        return r.status_code
+
+    # The test client connects as "testclient", standing in for the proxy
+    with (
+        patch(
+            "app.api.routes.login.is_trusted_proxy", lambda host: host == "testclient"
+        ),
+        patch("app.core.throttle.login_throttle.ip_max_failures", 2),
+    ):
+        first, second = random_ip(), random_ip()
+        assert [login(first) for _ in range(3)] == [400, 400, 429]
+        assert login(second) == 400
+
+
+def test_logout_revokes_token(client: TestClient) -> None:
+    login_data = {
+        "username": settings.FIRST_SUPERUSER,
+        "password": settings.FIRST_SUPERUSER_PASSWORD,
+    }
+    r = client.post(f"{settings.API_V1_STR}/login/access-token", data=login_data)
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    r = client.post(f"{settings.API_V1_STR}/login/logout", headers=headers)
+    assert r.status_code == 200
+    assert r.json() == {"message": "Logged out successfully"}
+
+    r = client.post(f"{settings.API_V1_STR}/login/test-token", headers=headers)
+    assert r.status_code == 403
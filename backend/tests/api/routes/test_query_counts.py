@@ -0,0 +1,102 @@
+from unittest.mock import patch
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlmodel import Session
+
+from app.core.config import settings
+from tests.utils.item import create_random_item
+from tests.utils.queries import assert_max_queries
+from tests.utils.user import create_random_user
+
+# Authentication takes up to two queries: the revocation list refresh and
+# loading the user on a principal cache miss. Listings have a route statement
+# timeout, set once per transaction
+
+# Count and page queries per listing for each LIST_QUERY_MODE. Pipelined
+# queries share a round trip but are still counted one by one
+LISTING_QUERIES = {"window": 1, "pipeline": 2, "separate": 2}
+
+
+def test_item_routes(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    url = f"{settings.API_V1_STR}/items/"
+    r = client.post(url, headers=normal_user_token_headers, json={"title": "Foo"})
+    assert_max_queries(r, 3)
+    item_id = r.json()["id"]
+
+    r = client.get(url, headers=normal_user_token_headers)
+    assert_max_queries(r, 5)
+    r = client.get(f"{url}{item_id}", headers=normal_user_token_headers)
+    assert_max_queries(r, 3)
+    r = client.put(
+        f"{url}{item_id}", headers=normal_user_token_headers, json={"title": "Bar"}
+    )
+    assert_max_queries(r, 3)
+    r = client.delete(f"{url}{item_id}", headers=normal_user_token_headers)
+    assert_max_queries(r, 3)
+
+
+def test_item_batch_routes(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    url = f"{settings.API_V1_STR}/items/batch"
+    r = client.post(
+        url, headers=normal_user_token_headers, json=[{"title": "Foo"}] * 50
+    )
+    # One multi-row INSERT, not one per item
+    assert_max_queries(r, 3)
+
+
+def test_superuser_item_routes(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    item = create_random_item(db)
+    r = client.get(f"{settings.API_V1_STR}/items/", headers=superuser_token_headers)
+    assert_max_queries(r, 5)
+    r = client.delete(
+        f"{settings.API_V1_STR}/items/{item.id}", headers=superuser_token_headers
+    )
+    assert_max_queries(r, 3)
+
+
+def test_user_routes(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    normal_user_token_headers: dict[str, str],
+    db: Session,
+) -> None:
+    url = f"{settings.API_V1_STR}/users/"
+    r = client.get(f"{url}me", headers=normal_user_token_headers)
+    assert_max_queries(r, 2)
+    r = client.get(url, headers=superuser_token_headers)
+    assert_max_queries(r, 5)
+
+    user = create_random_user(db)
+    r = client.patch(
+        f"{url}{user.id}",
+        headers=superuser_token_headers,
+        json={"full_name": "Updated"},
+    )
+    # get, UPDATE and the refresh after commit
+    assert_max_queries(r, 5)
+
+
+@pytest.mark.parametrize("mode", LISTING_QUERIES)
+def test_listing_routes(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    normal_user_token_headers: dict[str, str],
+    mode: str,
+) -> None:
+    limit = 3 + LISTING_QUERIES[mode]
+    with patch("app.core.config.settings.LIST_QUERY_MODE", mode):
+        r = client.get(
+            f"{settings.API_V1_STR}/items/", headers=normal_user_token_headers
+        )
+        assert_max_queries(r, limit)
+        # The queries have to be seen, or the budget means nothing
+        assert int(r.headers["X-DB-Queries"]) >= LISTING_QUERIES[mode]
+        r = client.get(f"{settings.API_V1_STR}/users/", headers=superuser_token_headers)
+        assert_max_queries(r, limit)
@@ -0,0 +1,26 @@
+import inspect
+
+from fastapi.dependencies.models import Dependant
+from fastapi.routing import APIRoute
+
+from app.api.deps import get_db
+from app.main import app
+
+
+def uses_sync_session(dependant: Dependant) -> bool:
+    return any(
+        dependency.call is get_db or uses_sync_session(dependency)
+        for dependency in dependant.dependencies
+    )
+
+
+def test_async_routes_use_async_session() -> None:
+    # The sync session would block the event loop in an async def handler
+    blocking = [
+        f"{sorted(route.methods)} {route.path}"
+        for route in app.routes
+        if isinstance(route, APIRoute)
+        and inspect.iscoroutinefunction(route.endpoint)
+        and uses_sync_session(route.dependant)
+    ]
+    assert blocking == []
@@ -1,3 +1,5 @@
+import json
+import time
 import uuid
 from unittest.mock import patch
 
@@ -5,9 +7,11 @@ from fastapi.testclient import TestClient
 from sqlmodel import Session, select
 
 from app import crud
+from app.core.cache import principal_cache
 from app.core.config import settings
 from app.core.security import verify_password
-from app.models import User, UserCreate
+from app.models import ItemCreate, User, UserCreate
+from tests.utils.user import user_authentication_headers
 from tests.utils.utils import random_email, random_lower_string
 
 
@@ -191,6 +195,26 @@ def test_update_user_me(
     assert user_db.full_name == full_name
 
 
+def test_update_user_me_invalidates_principal_cache(
+    client: TestClient, normal_user_token_headers: dict[str, str]
+) -> None:
+    client.get(f"{settings.API_V1_STR}/users/me", headers=normal_user_token_headers)
+    hits = principal_cache.stats().hits
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=normal_user_token_headers)
+    assert r.status_code == 200
+    assert principal_cache.stats().hits == hits + 1
+
+    full_name = random_lower_string()
+    r = client.patch(
+        f"{settings.API_V1_STR}/users/me",
+        headers=normal_user_token_headers,
+        json={"full_name": full_name},
+    )
+    assert r.status_code == 200
+    r = client.get(f"{settings.API_V1_STR}/users/me", headers=normal_user_token_headers)
+    assert r.json()["full_name"] == full_name
+
+
 def test_update_password_me(
     client: TestClient, superuser_token_headers: dict[str, str], db: Session
 ) -> None:
@@ -320,6 +344,18 @@ def test_register_user_already_exists_error(client: TestClient) -> None:
     assert r.json()["detail"] == "The user with this email already exists in the system"
 
 
+def test_register_user_email_case_insensitive(client: TestClient, db: Session) -> None:
+    username = random_email()
+    data = {"email": username.upper(), "password": random_lower_string()}
+    r = client.post(f"{settings.API_V1_STR}/users/signup", json=data)
+    assert r.status_code == 200
+    assert r.json()["email"] == username
+    data = {"email": username.capitalize(), "password": random_lower_string()}
+    r = client.post(f"{settings.API_V1_STR}/users/signup", json=data)
+    assert r.status_code == 400
+    assert crud.get_user_by_email(session=db, email=username.upper())
+
+
 def test_update_user(
     client: TestClient, superuser_token_headers: dict[str, str], db: Session
 ) -> None:
@@ -413,6 +449,32 @@ def test_delete_user_me(client: TestClient, db: Session) -> None:
     assert user_db is None
 
 
+def test_delete_user_me_in_batches(client: TestClient, db: Session) -> None:
+    username = random_email()
+    password = random_lower_string()
+    user = crud.create_user(
+        session=db, user_create=UserCreate(email=username, password=password)
+    )
+    user_id = user.id
+    for _ in range(5):
+        item_in = ItemCreate(title=random_lower_string())
+        crud.create_item(session=db, item_in=item_in, owner_id=user_id)
+    headers = user_authentication_headers(
+        client=client, email=username, password=password
+    )
+    with patch("app.core.config.settings.USER_DELETE_BATCH_SIZE", 2):
+        r = client.delete(f"{settings.API_V1_STR}/users/me", headers=headers)
+        assert r.status_code == 202
+        # The job is superuser-only, so the owner isn't pointed at it
+        assert "Location" not in r.headers
+        for _ in range(50):
+            db.expire_all()
+            if db.get(User, user_id) is None:
+                break
+            time.sleep(0.1)
+    assert db.get(User, user_id) is None
+
+
 def test_delete_user_me_as_superuser(
     client: TestClient, superuser_token_headers: dict[str, str]
 ) -> None:
@@ -444,6 +506,38 @@ def test_delete_user_super_user(
     assert result is None
 
 
+def test_delete_user_in_batches(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    user = crud.create_user(
+        session=db,
+        user_create=UserCreate(email=random_email(), password=random_lower_string()),
+    )
+    user_id = user.id
+    for _ in range(5):
+        item_in = ItemCreate(title=random_lower_string())
+        crud.create_item(session=db, item_in=item_in, owner_id=user_id)
+    with patch("app.core.config.settings.USER_DELETE_BATCH_SIZE", 2):
+        r = client.delete(
+            f"{settings.API_V1_STR}/users/{user_id}",
+            headers=superuser_token_headers,
+        )
+        assert r.status_code == 202
+        location = r.headers["Location"]
+        db.expire_all()
+        deactivated = db.get(User, user_id)
+        assert deactivated and not deactivated.is_active
+        for _ in range(50):
+            job = client.get(location, headers=superuser_token_headers).json()
+            if job["status"] != "running":
+                break
+            time.sleep(0.1)
+    assert job["status"] == "completed"
+    assert job["deleted_items"] == 5
+    db.expire_all()
+    assert db.get(User, user_id) is None
+
+
 def test_delete_user_not_found(
     client: TestClient, superuser_token_headers: dict[str, str]
 ) -> None:
@@ -484,3 +578,63 @@ def test_delete_user_without_privileges(
     )
     assert r.status_code == 403
     assert r.json()["detail"] == "The user doesn't have enough privileges"
+
+
+def test_import_users(
+    client: TestClient, superuser_token_headers: dict[str, str], db: Session
+) -> None:
+    existing = crud.create_user(
+        session=db,
+        user_create=UserCreate(email=random_email(), password=random_lower_string()),
+    )
+    new_email = random_email()
+    password = random_lower_string()
+    upload = "\n".join(
+        [
+            "email,password,full_name",
+            f"{new_email},{password},New User",
+            f"{new_email},{password},Duplicate",
+            f"{existing.email},{password},",
+            "not-an-email,short,",
+        ]
+    )
+    r = client.post(
+        f"{settings.API_V1_STR}/users/import",
+        headers={**superuser_token_headers, "Content-Type": "text/csv"},
+        content=upload.encode(),
+    )
+    assert r.status_code == 200
+    result = r.json()
+    assert result["total"] == 4
+    assert result["success_count"] == 1
+    assert [failure["line"] for failure in result["failed_items"]] == [3, 5, 4]
+    user = crud.get_user_by_email(session=db, email=new_email)
+    assert user
+    assert user.full_name == "New User"
+    assert verify_password(password, user.hashed_password)
+
+
+def test_import_users_unsupported_format(
+    client: TestClient, superuser_token_headers: dict[str, str]
+) -> None:
+    r = client.post(
+        f"{settings.API_V1_STR}/users/import",
+        headers=superuser_token_headers,
+        json=[],
+    )
+    assert r.status_code == 415
+
+
+def test_export_users(
+    client: TestClient,
+    superuser_token_headers: dict[str, str],
+    normal_user_token_headers: dict[str, str],
+) -> None:
+    url = f"{settings.API_V1_STR}/users/export"
+    r = client.get(url, headers=normal_user_token_headers)
+    assert r.status_code == 403
+    r = client.get(url, headers=superuser_token_headers)
+    assert r.status_code == 200
+    users = [json.loads(line) for line in r.text.splitlines()]
+    assert settings.FIRST_SUPERUSER in {user["email"] for user in users}
+    assert all("hashed_password" not in user for user in users)
@@ -0,0 +1,8 @@
+from fastapi.testclient import TestClient
+
+
+def test_jwks(client: TestClient) -> None:
+    r = client.get("/.well-known/jwks.json")
+    assert r.status_code == 200
+    assert "keys" in r.json()
+    assert "max-age" in r.headers["Cache-Control"]
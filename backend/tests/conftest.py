@@ -1,4 +1,5 @@
 from collections.abc import Generator
+from unittest.mock import patch
 
 import pytest
 from fastapi.testclient import TestClient
@@ -6,6 +7,7 @@ from sqlmodel import Session, delete
 
 from app.core.config import settings
 from app.core.db import engine, init_db
+from app.core.throttle import MemoryThrottleStore, login_throttle
 from app.main import app
 from app.models import Item, User
 from tests.utils.user import authentication_token_from_email
@@ -24,6 +26,22 @@ def db() -> Generator[Session, None, None]:
         session.commit()
 
 
+@pytest.fixture(scope="session", autouse=True)
+def throttle_store() -> Generator[MemoryThrottleStore, None, None]:
+    # Keep login failures of test runs out of the shared /dev/shm store
+    store = MemoryThrottleStore()
+    original, login_throttle.store = login_throttle.store, store
+    yield store
+    login_throttle.store = original
+
+
+@pytest.fixture(scope="session", autouse=True)
+def query_headers() -> Generator[None, None, None]:
+    # X-DB-Queries is read by tests.utils.queries.assert_max_queries
+    with patch("app.core.config.settings.DB_QUERY_HEADERS", True):
+        yield
+
+
 @pytest.fixture(scope="module")
 def client() -> Generator[TestClient, None, None]:
     with TestClient(app) as c:
@@ -0,0 +1,55 @@
+import time
+
+from app.core.cache import TTLCache
+
+
+def test_get_and_set() -> None:
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=60)
+    assert cache.get("a") is None
+    cache.set("a", 1)
+    assert cache.get("a") == 1
+    stats = cache.stats()
+    assert stats.hits == 1
+    assert stats.misses == 1
+    assert stats.size == 1
+
+
+def test_entries_expire() -> None:
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=0.01)
+    cache.set("a", 1)
+    time.sleep(0.02)
+    assert cache.get("a") is None
+    assert cache.stats().size == 0
+
+
+def test_least_recently_used_is_evicted() -> None:
+    cache: TTLCache[str, int] = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")
+    cache.set("c", 3)
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_invalidate() -> None:
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+    cache.invalidate("a")
+    assert cache.get("a") is None
+
+
+def test_disabled_cache_stores_nothing() -> None:
+    cache: TTLCache[str, int] = TTLCache(maxsize=0, ttl=60)
+    cache.set("a", 1)
+    assert cache.get("a") is None
+
+
+def test_entry_ttl_cannot_exceed_default() -> None:
+    cache: TTLCache[str, int] = TTLCache(maxsize=10, ttl=0.01)
+    cache.set("a", 1, ttl=60)
+    cache.set("b", 2, ttl=-1)
+    assert cache.get("b") is None
+    time.sleep(0.02)
+    assert cache.get("a") is None
@@ -0,0 +1,65 @@
+import asyncio
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+
+from app.common import SystemException
+from app.core.hashing import PasswordHasher
+
+
+def test_hash_and_verify() -> None:
+    hasher = PasswordHasher(max_workers=1, max_queue_size=4)
+    try:
+        hashed = asyncio.run(hasher.hash("secret-password"))
+        assert asyncio.run(hasher.verify("secret-password", hashed))
+        assert not asyncio.run(hasher.verify("wrong-password", hashed))
+        stats = hasher.stats()
+        assert stats.completed == 3
+        assert stats.queue_depth == 0
+        assert stats.max_latency_ms > 0
+    finally:
+        hasher.shutdown()
+
+
+def test_rejects_when_queue_is_full() -> None:
+    hasher = PasswordHasher(max_workers=1, max_queue_size=0)
+    with pytest.raises(SystemException) as exc_info:
+        asyncio.run(hasher.hash("secret-password"))
+    assert exc_info.value.http_status == 503
+    assert hasher.stats().rejected == 1
+
+
+def test_hash_many() -> None:
+    hasher = PasswordHasher(max_workers=2, max_queue_size=4)
+    passwords = [f"secret-password-{i}" for i in range(10)]
+    try:
+        hashes = asyncio.run(hasher.hash_many(passwords))
+        assert len(hashes) == len(passwords)
+        assert asyncio.run(hasher.verify(passwords[9], hashes[9]))
+        # Three batches of up to four passwords, then the verify
+        assert hasher.stats().completed == 4
+        assert asyncio.run(hasher.hash_many([])) == []
+    finally:
+        hasher.shutdown()
+
+
+@pytest.mark.parametrize("reserved_workers, expected", [(0, 3), (1, 2)])
+def test_hash_many_reserved_workers(reserved_workers: int, expected: int) -> None:
+    hasher = PasswordHasher(
+        max_workers=3, max_queue_size=8, reserved_workers=reserved_workers
+    )
+    running = peak = 0
+
+    async def run(_fn: Any, batch: list[str]) -> list[str]:
+        nonlocal running, peak
+        running += 1
+        peak = max(peak, running)
+        await asyncio.sleep(0.01)
+        running -= 1
+        return batch
+
+    with patch.object(hasher, "_run", run):
+        passwords = [str(i) for i in range(20)]
+        assert asyncio.run(hasher.hash_many(passwords)) == passwords
+    assert peak == expected
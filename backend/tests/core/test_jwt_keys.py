@@ -0,0 +1,89 @@
+from pathlib import Path
+
+import jwt
+import pytest
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ed25519, rsa
+from jwt.exceptions import InvalidTokenError
+
+from app.core.jwt_keys import KeyRing
+
+
+def write_private_key(directory: Path, kid: str, key: object) -> None:
+    assert isinstance(key, ed25519.Ed25519PrivateKey | rsa.RSAPrivateKey)
+    pem = key.private_bytes(
+        serialization.Encoding.PEM,
+        serialization.PrivateFormat.PKCS8,
+        serialization.NoEncryption(),
+    )
+    (directory / f"{kid}.pem").write_bytes(pem)
+
+
+def write_public_key(directory: Path, kid: str, key: object) -> None:
+    assert isinstance(key, ed25519.Ed25519PrivateKey | rsa.RSAPrivateKey)
+    pem = key.public_key().public_bytes(
+        serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+    )
+    (directory / f"{kid}.pem").write_bytes(pem)
+
+
+def test_secret_key_ring() -> None:
+    ring = KeyRing.from_secret("secret")
+    token = ring.encode({"sub": "user"})
+    assert "kid" not in jwt.get_unverified_header(token)
+    assert jwt.get_unverified_header(token)["alg"] == "HS256"
+    assert ring.decode(token)["sub"] == "user"
+    assert ring.jwks() == {"keys": []}
+
+
+@pytest.mark.parametrize(
+    "key,algorithm",
+    [
+        (ed25519.Ed25519PrivateKey.generate(), "EdDSA"),
+        (rsa.generate_private_key(public_exponent=65537, key_size=2048), "RS256"),
+    ],
+)
+def test_asymmetric_key_ring(tmp_path: Path, key: object, algorithm: str) -> None:
+    write_private_key(tmp_path, "k1", key)
+    ring = KeyRing.from_directory(tmp_path)
+    token = ring.encode({"sub": "user"})
+    header = jwt.get_unverified_header(token)
+    assert header == {"alg": algorithm, "kid": "k1", "typ": "JWT"}
+    assert ring.decode(token)["sub"] == "user"
+
+    (jwk,) = ring.jwks()["keys"]
+    assert jwk["kid"] == "k1"
+    assert jwk["alg"] == algorithm
+    assert "d" not in jwk
+    # Another service only needs the published JWK to verify the token
+    public_key = jwt.PyJWK(jwk).key
+    assert jwt.decode(token, public_key, algorithms=[algorithm])["sub"] == "user"
+
+
+def test_rotation_keeps_old_tokens_valid(tmp_path: Path) -> None:
+    old_key = ed25519.Ed25519PrivateKey.generate()
+    write_private_key(tmp_path, "2026-01", old_key)
+    old_token = KeyRing.from_directory(tmp_path).encode({"sub": "user"})
+
+    write_public_key(tmp_path, "2026-01", old_key)
+    write_private_key(tmp_path, "2026-02", ed25519.Ed25519PrivateKey.generate())
+    ring = KeyRing.from_directory(tmp_path)
+    assert ring.active.kid == "2026-02"
+    assert ring.decode(old_token)["sub"] == "user"
+    assert {jwk["kid"] for jwk in ring.jwks()["keys"]} == {"2026-01", "2026-02"}
+
+    with pytest.raises(ValueError):
+        KeyRing.from_directory(tmp_path, active_kid="2026-01")
+
+
+def test_rejects_unknown_kid_and_algorithm_confusion(tmp_path: Path) -> None:
+    write_private_key(tmp_path, "k1", ed25519.Ed25519PrivateKey.generate())
+    ring = KeyRing.from_directory(tmp_path)
+    foreign = KeyRing.from_secret("secret").encode({"sub": "user"})
+    with pytest.raises(InvalidTokenError):
+        ring.decode(foreign)
+    forged = jwt.encode(
+        {"sub": "user"}, "secret", algorithm="HS256", headers={"kid": "k1"}
+    )
+    with pytest.raises(InvalidTokenError):
+        ring.decode(forged)
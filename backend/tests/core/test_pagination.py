@@ -0,0 +1,105 @@
+import asyncio
+import uuid
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from dataclasses import dataclass
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy.dialects.postgresql.psycopg import PGDialectAsync_psycopg
+from sqlmodel import func, select
+
+from app.core.pagination import (
+    Page,
+    decode_cursor,
+    encode_cursor,
+    run_pipeline,
+    split_page,
+)
+from app.core.query_counter import track_queries
+from app.core.slow_queries import SlowQueryLog
+from app.models import Item
+
+
+@dataclass
+class Row:
+    id: uuid.UUID
+
+
+def test_cursor_round_trip() -> None:
+    key = uuid.uuid4()
+    cursor = encode_cursor(key)
+    assert "=" not in cursor
+    assert decode_cursor(cursor) == key
+
+
+@pytest.mark.parametrize(
+    "cursor", ["not-a-cursor", "e30", encode_cursor(uuid.uuid4())[:-3]]
+)
+def test_decode_invalid_cursor(cursor: str) -> None:
+    with pytest.raises(ValueError):
+        decode_cursor(cursor)
+
+
+def test_split_page() -> None:
+    rows = [Row(id=uuid.uuid4()) for _ in range(3)]
+    page = Page(skip=0, limit=2)
+    data, next_cursor = split_page(rows, page)
+    assert data == rows[:2]
+    assert next_cursor is not None
+    assert decode_cursor(next_cursor) == rows[1].id
+
+    data, next_cursor = split_page(rows[:2], page)
+    assert data == rows[:2]
+    assert next_cursor is None
+
+
+class PipelineCursor:
+    async def execute(self, query: str, params: Any) -> None:
+        self.rows = [{"query": query}]
+
+    async def fetchall(self) -> list[dict[str, Any]]:
+        return self.rows
+
+    async def close(self) -> None:
+        pass
+
+
+class PipelineSession:
+    """
+    Stands in for an AsyncSession on a psycopg connection.
+    """
+
+    async def connection(self) -> Any:
+        @asynccontextmanager
+        async def pipeline() -> AsyncIterator[None]:
+            yield
+
+        driver_connection = SimpleNamespace(
+            cursor=lambda row_factory: PipelineCursor(), pipeline=pipeline
+        )
+
+        async def get_raw_connection() -> Any:
+            return SimpleNamespace(driver_connection=driver_connection)
+
+        return SimpleNamespace(
+            dialect=PGDialectAsync_psycopg(), get_raw_connection=get_raw_connection
+        )
+
+
+def test_run_pipeline_records_queries() -> None:
+    slow_log = SlowQueryLog(max_statements=10)
+    statements = [select(func.count()).select_from(Item), select(Item).limit(10)]
+    with (
+        patch("app.core.pagination.slow_query_log", slow_log),
+        patch("app.core.config.settings.DB_SLOW_QUERY_MS", 1e-9),
+        track_queries() as stats,
+    ):
+        results = asyncio.run(run_pipeline(PipelineSession(), *statements))  # type: ignore
+    assert len(results) == 2
+    # Counted although the driver connection bypasses the engine events
+    assert stats.count == 2
+    assert sorted(stats.statements) == sorted(row["query"] for [row] in results)
+    assert len(slow_log.top(10)) == 2
@@ -0,0 +1,45 @@
+from pathlib import Path
+
+import pytest
+from sqlalchemy import create_engine, exc, text
+
+from app.core.pool import MonitoredQueuePool, pool_stats, warm_up
+
+
+def test_warm_up_and_stats(tmp_path: Path) -> None:
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=MonitoredQueuePool,
+        pool_size=3,
+        max_overflow=1,
+    )
+    assert warm_up(engine, 5) == 3
+    stats = pool_stats(engine)
+    assert stats is not None
+    assert stats.checked_in == 3
+    assert stats.checked_out == 0
+    assert stats.checkouts == 3
+
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        stats = pool_stats(engine)
+        assert stats is not None
+        assert stats.checked_out == 1
+        assert stats.overflow == 0
+
+
+def test_checkout_timeout_is_counted(tmp_path: Path) -> None:
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}",
+        poolclass=MonitoredQueuePool,
+        pool_size=1,
+        max_overflow=0,
+        pool_timeout=0.01,
+    )
+    with engine.connect():
+        with pytest.raises(exc.TimeoutError):
+            engine.connect()
+    stats = pool_stats(engine)
+    assert stats is not None
+    assert stats.timeouts == 1
+    assert stats.max_wait_ms >= 10
@@ -0,0 +1,63 @@
+import logging
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import Engine, create_engine, text
+
+from app.core.query_counter import QueryCounterMiddleware, instrument, track_queries
+
+
+@pytest.fixture
+def engine() -> Engine:
+    engine = create_engine("sqlite://")
+    instrument(engine)
+    return engine
+
+
+def test_track_queries(engine: Engine) -> None:
+    with engine.connect() as connection:
+        connection.execute(text("SELECT 1"))
+        with track_queries() as stats:
+            connection.execute(text("SELECT 1"))
+            connection.execute(text("SELECT 2"))
+            connection.execute(text("SELECT 1"))
+    assert stats.count == 3
+    assert stats.duration > 0
+    assert stats.statements["SELECT 1"] == 2
+    assert stats.repeated(2) == [("SELECT 1", 2)]
+
+
+def test_middleware(engine: Engine, caplog: pytest.LogCaptureFixture) -> None:
+    app = FastAPI()
+    app.add_middleware(QueryCounterMiddleware)
+
+    @app.get("/")
+    def index() -> None:
+        with engine.connect() as connection:
+            for _ in range(3):
+                connection.execute(text("SELECT 1"))
+
+    with (
+        patch("app.core.config.settings.DB_QUERY_HEADERS", True),
+        patch("app.core.config.settings.DB_N_PLUS_ONE_THRESHOLD", 3),
+        caplog.at_level(logging.WARNING, logger="app.core.query_counter"),
+    ):
+        response = TestClient(app).get("/")
+    assert response.headers["X-DB-Queries"] == "3"
+    assert float(response.headers["X-DB-Time"]) >= 0
+    assert "Possible N+1 query: GET / ran 3 times" in caplog.text
+
+
+def test_middleware_headers_disabled() -> None:
+    app = FastAPI()
+    app.add_middleware(QueryCounterMiddleware)
+
+    @app.get("/")
+    async def index() -> None:
+        return None
+
+    with patch("app.core.config.settings.DB_QUERY_HEADERS", False):
+        response = TestClient(app).get("/")
+    assert "X-DB-Queries" not in response.headers
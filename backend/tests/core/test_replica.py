@@ -0,0 +1,64 @@
+import sqlite3
+import uuid
+from pathlib import Path
+from unittest.mock import patch
+
+from sqlalchemy import create_engine
+from sqlmodel import Session
+
+from app.core.replica import RoutingSession, StickyStore, bind_principal
+
+
+def test_sticky_store_pins_expire(tmp_path: Path) -> None:
+    store = StickyStore(tmp_path / "sticky.sqlite3", window=60)
+    assert not store.is_pinned("user")
+    store.pin("user").result()
+    assert store.is_pinned("user")
+    # Other worker processes see the same file
+    assert StickyStore(tmp_path / "sticky.sqlite3", window=60).is_pinned("user")
+
+    expired = StickyStore(tmp_path / "expired.sqlite3", window=-1)
+    expired.pin("user").result()
+    assert not expired.is_pinned("user")
+
+
+def test_sticky_store_remembers_own_pins(tmp_path: Path) -> None:
+    path = tmp_path / "sticky.sqlite3"
+    store = StickyStore(path, window=60)
+    store.pin("user").result()
+    with sqlite3.connect(path) as conn:
+        conn.execute("DELETE FROM sticky")
+    # Answered from memory, without reading the file
+    assert store.is_pinned("user")
+    assert not StickyStore(path, window=60).is_pinned("user")
+
+
+def test_routing_session_uses_replica_until_user_wrote(tmp_path: Path) -> None:
+    primary = create_engine("sqlite://")
+    replica = create_engine("sqlite://")
+    store = StickyStore(tmp_path / "sticky.sqlite3", window=60)
+    user_id = uuid.uuid4()
+
+    with patch("app.core.replica.sticky_store", store):
+        session = RoutingSession(primary, info={"replica": replica})
+        bind_principal(session, user_id)
+        assert session.get_bind() is replica
+        assert session.get_bind(primary=True) is primary
+
+        store.pin(str(user_id))
+        session = RoutingSession(primary, info={"replica": replica})
+        bind_principal(session, user_id)
+        assert session.get_bind() is primary
+
+
+def test_commit_pins_principal(tmp_path: Path) -> None:
+    store = StickyStore(tmp_path / "sticky.sqlite3", window=60)
+    user_id = uuid.uuid4()
+    with (
+        patch("app.core.replica.sticky_store", store),
+        patch("app.core.config.settings.POSTGRES_REPLICA_SERVERS", ["replica"]),
+    ):
+        session: Session = RoutingSession(create_engine("sqlite://"))
+        bind_principal(session, user_id)
+        session.commit()
+    assert store.is_pinned(str(user_id))
@@ -0,0 +1,102 @@
+import logging
+import time
+from unittest.mock import patch
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import Engine, create_engine, text
+
+from app.core.query_counter import QueryCounterMiddleware
+from app.core.slow_queries import SlowQueryLog, normalize_sql, redact_parameters
+
+
+@pytest.fixture
+def engine() -> Engine:
+    return create_engine("sqlite://")
+
+
+@pytest.fixture
+def slow_log(engine: Engine) -> SlowQueryLog:
+    slow_log = SlowQueryLog(max_statements=2)
+    slow_log.instrument(engine)
+    slow_log.explain_engine = engine
+    return slow_log
+
+
+def wait_for_plan(slow_log: SlowQueryLog) -> str | None:
+    for _ in range(100):
+        plan = slow_log.top(1)[0].plan
+        if plan is not None:
+            return plan
+        time.sleep(0.01)
+    return None
+
+
+def test_normalize_sql() -> None:
+    assert (
+        normalize_sql(
+            "SELECT * FROM item\n  WHERE title = 'it''s' AND id IN "
+            "(%(id_1_1)s, %(id_1_2)s) LIMIT 10"
+        )
+        == "SELECT * FROM item WHERE title = ? AND id IN (...) LIMIT ?"
+    )
+    assert (
+        normalize_sql("INSERT INTO t (a, b) VALUES (%(a__0)s, 1), (%(a__1)s, 2)")
+        == "INSERT INTO t (a, b) VALUES (%(a__0)s, ?)"
+    )
+    assert normalize_sql("SELECT col_1 FROM t WHERE x = $1") == (
+        "SELECT col_1 FROM t WHERE x = $1"
+    )
+
+
+def test_redact_parameters() -> None:
+    assert redact_parameters(
+        {"email_1": "a@example.com", "hashed_password": "x", "limit": 10}
+    ) == {"email_1": "<str len=13>", "hashed_password": "***", "limit": 10}
+    assert redact_parameters(("abc", None)) == ["<str len=3>", None]
+
+
+def test_slow_query_log(
+    engine: Engine, slow_log: SlowQueryLog, caplog: pytest.LogCaptureFixture
+) -> None:
+    app = FastAPI()
+    app.add_middleware(QueryCounterMiddleware)
+
+    @app.get("/items/{id}")
+    def read_item(id: int) -> None:
+        with engine.connect() as connection:
+            connection.execute(text("SELECT :id"), {"id": id})
+
+    with (
+        patch("app.core.config.settings.DB_SLOW_QUERY_MS", 1e-9),
+        caplog.at_level(logging.WARNING, logger="app.core.slow_queries"),
+    ):
+        client = TestClient(app)
+        client.get("/items/1", headers={"X-Request-ID": "abc"})
+        client.get("/items/2")
+
+    assert "Slow query" in caplog.text
+    assert "route=GET /items/{id} request_id=abc" in caplog.text
+    [statement] = slow_log.top(10)
+    assert statement.sql == "SELECT ?"
+    assert statement.calls == 2
+    assert statement.max_ms >= statement.total_ms / 2
+    assert statement.last is not None
+    assert statement.last.parameters == [2]
+    assert statement.last.route == "GET /items/{id}"
+    assert wait_for_plan(slow_log)
+    slow_log.shutdown()
+
+
+def test_slow_query_log_bounded(engine: Engine, slow_log: SlowQueryLog) -> None:
+    slow_log.record("SELECT a FROM t", None, 30)
+    slow_log.record("SELECT b FROM t", None, 10)
+    slow_log.record("SELECT c FROM t", None, 20)
+    assert [s.sql for s in slow_log.top(10)] == ["SELECT a FROM t", "SELECT c FROM t"]
+    assert [s.sql for s in slow_log.top(1, "max")] == ["SELECT a FROM t"]
+    with patch("app.core.config.settings.DB_SLOW_QUERY_MS", 0):
+        with engine.connect() as connection:
+            connection.execute(text("SELECT 1"))
+    assert len(slow_log.top(10)) == 2
+    slow_log.shutdown()
@@ -0,0 +1,66 @@
+from pathlib import Path
+
+import pytest
+
+from app.common import RateLimitException
+from app.core.throttle import (
+    LoginThrottle,
+    MemoryThrottleStore,
+    SharedMemoryThrottleStore,
+    ThrottleStore,
+)
+
+
+def make_throttle(store: ThrottleStore) -> LoginThrottle:
+    return LoginThrottle(
+        store,
+        window=60,
+        account_max_failures=3,
+        ip_max_failures=5,
+        lockout=10,
+        max_lockout=25,
+    )
+
+
+@pytest.fixture(params=["memory", "shared"])
+def throttle(request: pytest.FixtureRequest, tmp_path: Path) -> LoginThrottle:
+    if request.param == "memory":
+        return make_throttle(MemoryThrottleStore())
+    return make_throttle(SharedMemoryThrottleStore(tmp_path / "throttle.db", ttl=85))
+
+
+def test_locks_account_after_max_failures(throttle: LoginThrottle) -> None:
+    keys = throttle.keys(scope="login", account="User@Example.com", ip="10.0.0.1")
+    for _ in range(2):
+        throttle.record_failure(keys)
+        throttle.check(keys)
+    throttle.record_failure(keys)
+    with pytest.raises(RateLimitException) as exc_info:
+        throttle.check(keys)
+    assert 0 < exc_info.value.retry_after <= 10
+
+    other_ip = throttle.keys(scope="login", account="user@example.com", ip="10.0.0.2")
+    with pytest.raises(RateLimitException):
+        throttle.check(other_ip)
+
+
+def test_lockout_grows_exponentially(throttle: LoginThrottle) -> None:
+    keys = throttle.keys(scope="login", account="user@example.com", ip=None)
+    expected = [10, 20, 25]
+    for duration in expected:
+        for _ in range(3):
+            throttle.record_failure(keys)
+        with pytest.raises(RateLimitException) as exc_info:
+            throttle.check(keys)
+        assert duration - 1 <= exc_info.value.retry_after <= duration
+
+
+def test_reset_clears_account(throttle: LoginThrottle) -> None:
+    keys = throttle.keys(scope="login", account="user@example.com", ip="10.0.0.1")
+    for _ in range(3):
+        throttle.record_failure(keys)
+    throttle.reset(keys[:1])
+    throttle.check(keys[:1])
+    state = throttle.store.get(keys[1])
+    assert state
+    assert len(state.failures) == 3
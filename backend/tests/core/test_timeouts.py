@@ -0,0 +1,143 @@
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
+from types import SimpleNamespace
+from typing import Any
+from unittest.mock import patch
+
+import pytest
+from fastapi import Depends, FastAPI
+from fastapi.testclient import TestClient
+from psycopg import errors
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.dialects.postgresql.psycopg import PGDialectAsync_psycopg
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session, select
+
+from app.api.deps import get_async_db, get_db
+from app.common import register_exception_handlers
+from app.core.pagination import Page, fetch_page
+from app.core.timeouts import (
+    InvalidDeadline,
+    set_statement_timeout,
+    statement_timeout,
+)
+from app.models import Item
+
+
+@pytest.fixture(autouse=True)
+def timeouts() -> Any:
+    with (
+        patch("app.core.config.settings.DB_STATEMENT_TIMEOUT_MS", 30_000),
+        patch(
+            "app.core.config.settings.DB_ROUTE_STATEMENT_TIMEOUTS_MS",
+            {"items-read_items": 5000},
+        ),
+    ):
+        yield
+
+
+def test_statement_timeout() -> None:
+    assert statement_timeout(None, None) is None
+    assert statement_timeout("items-read_item", None) is None
+    assert statement_timeout("items-read_items", None) == 5000
+    assert statement_timeout("items-read_items", "800") == 800
+    assert statement_timeout("items-read_items", "9000") == 5000
+    assert statement_timeout("items-read_item", "-5") == 1
+    with pytest.raises(InvalidDeadline):
+        statement_timeout(None, "soon")
+
+
+def test_statement_timeout_disabled() -> None:
+    with patch("app.core.config.settings.DB_STATEMENT_TIMEOUT_MS", 0):
+        assert statement_timeout("items-read_item", None) is None
+        assert statement_timeout("items-read_item", "800") == 800
+
+
+def test_set_statement_timeout() -> None:
+    engine = create_engine("sqlite://")
+    calls = []
+
+    # Stand-in for the Postgres function
+    @event.listens_for(engine, "connect")
+    def connect(dbapi_connection: Any, _connection_record: Any) -> None:
+        dbapi_connection.create_function(
+            "set_config", 3, lambda *args: calls.append(args)
+        )
+
+    with Session(engine) as session:
+        set_statement_timeout(session, 800)
+        session.exec(text("SELECT 1"))  # type: ignore
+        session.commit()
+        session.exec(text("SELECT 1"))  # type: ignore
+    assert calls == [("statement_timeout", "800ms", 1)] * 2
+
+
+class QueryCanceled(Exception):
+    sqlstate = "57014"
+
+
+@pytest.mark.parametrize("get_session", [get_db, get_async_db])
+def test_query_canceled_is_service_unavailable(get_session: Any) -> None:
+    app = FastAPI()
+    register_exception_handlers(app)
+
+    @app.get("/", dependencies=[Depends(get_session)])
+    async def index() -> None:
+        raise OperationalError("SELECT 1", {}, QueryCanceled())
+
+    client = TestClient(app, raise_server_exceptions=False)
+    r = client.get("/", headers={"X-Request-Deadline": "800"})
+    assert r.status_code == 503
+    assert r.json()["detail"] == "Statement timeout of 800 ms exceeded"
+    r = client.get("/", headers={"X-Request-Deadline": "soon"})
+    assert r.status_code == 400
+
+
+class CanceledCursor:
+    async def execute(self, query: str, params: Any) -> None:
+        raise errors.QueryCanceled("canceling statement due to statement timeout")
+
+    async def close(self) -> None:
+        pass
+
+
+class CanceledDriverConnection:
+    def cursor(self, row_factory: Any) -> CanceledCursor:
+        return CanceledCursor()
+
+    @asynccontextmanager
+    async def pipeline(self) -> AsyncIterator[None]:
+        yield
+
+
+class CanceledSession:
+    """
+    Stands in for an AsyncSession whose listing queries hit statement_timeout.
+    """
+
+    async def connection(self) -> Any:
+        async def get_raw_connection() -> Any:
+            return SimpleNamespace(driver_connection=CanceledDriverConnection())
+
+        return SimpleNamespace(
+            dialect=PGDialectAsync_psycopg(), get_raw_connection=get_raw_connection
+        )
+
+
+def test_pipelined_query_canceled_is_service_unavailable() -> None:
+    app = FastAPI()
+    register_exception_handlers(app)
+
+    @app.get("/", dependencies=[Depends(get_async_db)])
+    async def index() -> None:
+        page = Page(skip=0, limit=10)
+        await fetch_page(CanceledSession(), select(Item), Item.id, page)  # type: ignore
+
+    client = TestClient(app, raise_server_exceptions=False)
+    with (
+        patch("app.core.config.settings.LIST_QUERY_MODE", "pipeline"),
+        patch("app.core.pagination.AsyncPipeline.is_supported", lambda: True),
+    ):
+        r = client.get("/", headers={"X-Request-Deadline": "800"})
+    assert r.status_code == 503
+    assert r.json()["detail"] == "Statement timeout of 800 ms exceeded"
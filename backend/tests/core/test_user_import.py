@@ -0,0 +1,76 @@
+import asyncio
+from collections.abc import AsyncIterator
+
+from app.core.user_import import (
+    ImportFormat,
+    Record,
+    import_format,
+    iter_lines,
+    iter_records,
+)
+
+
+async def stream(*chunks: bytes) -> AsyncIterator[bytes]:
+    for chunk in chunks:
+        yield chunk
+
+
+def parse(fmt: ImportFormat, *chunks: bytes) -> list[Record]:
+    async def collect() -> list[Record]:
+        lines = iter_lines(stream(*chunks))
+        return [record async for record in iter_records(lines, fmt)]
+
+    return asyncio.run(collect())
+
+
+def test_import_format() -> None:
+    assert import_format("text/csv; charset=utf-8") == "csv"
+    assert import_format("application/x-ndjson") == "ndjson"
+    assert import_format("application/json") is None
+
+
+def test_iter_lines_across_chunks() -> None:
+    async def collect() -> list[str]:
+        chunks = stream(b"\xef\xbb\xbfa,b\r\nc", "é\n".encode()[:1], "é\n".encode()[1:])
+        return [line async for line in iter_lines(chunks)]
+
+    assert asyncio.run(collect()) == ["a,b", "cé"]
+
+
+def test_iter_records_csv() -> None:
+    records = parse(
+        "csv",
+        b"email,password,full_name\n",
+        b'a@example.com,secret-password,"Doe, Jane"\n\n',
+        b"b@example.com,secret-password,\n",
+        b"c@example.com\n",
+    )
+    assert records == [
+        (
+            2,
+            {
+                "email": "a@example.com",
+                "password": "secret-password",
+                "full_name": "Doe, Jane",
+            },
+            None,
+        ),
+        (4, {"email": "b@example.com", "password": "secret-password"}, None),
+        (5, None, "Expected 3 columns, got 1"),
+    ]
+
+
+def test_iter_records_ndjson() -> None:
+    records = parse(
+        "ndjson",
+        b'{"email": "a@example.com", "password": "secret-password"}\n',
+        b"[1]\n{not json",
+    )
+    assert records[0] == (
+        1,
+        {"email": "a@example.com", "password": "secret-password"},
+        None,
+    )
+    assert records[1] == (2, None, "Expected a JSON object")
+    assert records[2][0] == 3
+    assert records[2][2] is not None and records[2][2].startswith("Invalid JSON")
@@ -0,0 +1,105 @@
+import uuid
+from collections.abc import Generator, Iterator
+from datetime import datetime, timezone
+from typing import Any
+
+import pytest
+from sqlalchemy import text
+from sqlalchemy.sql import ClauseElement
+from sqlmodel import Session, col, delete, func, select
+
+from app import crud
+from app.core.db import engine
+from app.core.pagination import Page, paginate
+from app.core.revocation import SYNC_SKEW
+from app.core.search import search_items
+from app.models import Item, ItemCreate, RevokedToken, User
+from tests.utils.user import create_random_user
+from tests.utils.utils import random_lower_string
+
+
+@pytest.fixture(scope="module")
+def owner(db: Session) -> User:
+    user = create_random_user(db)
+    for _ in range(5):
+        item_in = ItemCreate(title=random_lower_string())
+        crud.create_item(session=db, item_in=item_in, owner_id=user.id)
+    return user
+
+
+# Sequential scans are disabled for the planner, so a query only ends up
+# with a Seq Scan node when no index can serve it
+@pytest.fixture
+def plan_session() -> Generator[Session, None, None]:
+    with Session(engine) as session:
+        session.execute(text("SET LOCAL enable_seqscan = off"))
+        yield session
+        session.rollback()
+
+
+def plan_nodes(plan: dict[str, Any]) -> Iterator[str]:
+    yield plan["Node Type"]
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def assert_no_seq_scan(session: Session, statement: ClauseElement) -> None:
+    connection = session.connection()
+    compiled = statement.compile(dialect=connection.dialect)
+    result = connection.exec_driver_sql(
+        f"EXPLAIN (FORMAT JSON) {compiled}", compiled.params
+    )
+    plan = result.scalar_one()[0]["Plan"]
+    assert "Seq Scan" not in set(plan_nodes(plan)), f"Seq scan in plan of:\n{compiled}"
+
+
+def test_read_items_owner_page(plan_session: Session, owner: User) -> None:
+    statement = select(Item).where(Item.owner_id == owner.id)
+    assert_no_seq_scan(
+        plan_session, paginate(statement, Item.id, Page(skip=0, limit=100))
+    )
+    page = Page(skip=0, limit=100, after=uuid.uuid4())
+    assert_no_seq_scan(plan_session, paginate(statement, Item.id, page))
+
+
+@pytest.mark.usefixtures("owner")
+def test_read_items_all_page(plan_session: Session) -> None:
+    page = Page(skip=0, limit=100, after=uuid.uuid4())
+    assert_no_seq_scan(plan_session, paginate(select(Item), Item.id, page))
+
+
+def test_read_users_page(plan_session: Session) -> None:
+    page = Page(skip=0, limit=100, after=uuid.uuid4())
+    assert_no_seq_scan(plan_session, paginate(select(User), User.id, page))
+
+
+def test_search_items(plan_session: Session, owner: User) -> None:
+    statement, _ = search_items(select(Item), "foo bar")
+    assert_no_seq_scan(plan_session, statement)
+    statement, _ = search_items(select(Item).where(Item.owner_id == owner.id), "foo")
+    assert_no_seq_scan(plan_session, statement)
+
+
+def test_owner_item_count(plan_session: Session, owner: User) -> None:
+    statement = select(Item).where(Item.owner_id == owner.id)
+    count_statement = select(func.count()).select_from(statement.subquery())
+    assert_no_seq_scan(plan_session, count_statement)
+
+
+def test_delete_user_items(plan_session: Session, owner: User) -> None:
+    statement = delete(Item).where(col(Item.owner_id) == owner.id)
+    assert_no_seq_scan(plan_session, statement)
+
+
+def test_get_user_by_email(plan_session: Session, owner: User) -> None:
+    assert_no_seq_scan(plan_session, crud.select_user_by_email(owner.email))
+
+
+def test_revocation_sync(plan_session: Session) -> None:
+    now = datetime.now(timezone.utc)
+    statement = (
+        select(RevokedToken.jti, RevokedToken.expires_at)
+        .where(col(RevokedToken.expires_at) > now)
+        .where(col(RevokedToken.revoked_at) >= now - SYNC_SKEW)
+    )
+    assert_no_seq_scan(plan_session, statement)
@@ -0,0 +1,42 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+from typing import Any
+from unittest.mock import patch
+
+from app.core.db import async_engine, new_async_session
+from app.core.revocation import RevocationList
+
+
+class FastClock(datetime):
+    """
+    A worker whose clock runs a minute ahead of the database.
+    """
+
+    @classmethod
+    def now(cls, tz: Any = None) -> "FastClock":
+        return super().now(tz) + timedelta(minutes=1)
+
+
+def test_sync_ignores_worker_clock() -> None:
+    ahead = RevocationList(refresh_interval=0)
+    other = RevocationList(refresh_interval=0)
+    expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
+    first, second = str(uuid.uuid4()), str(uuid.uuid4())
+
+    async def run() -> tuple[bool, bool]:
+        async with new_async_session() as session:
+            await other.revoke(session, first, expires_at)
+        with patch("app.core.revocation.datetime", FastClock):
+            async with new_async_session() as session:
+                assert await ahead.is_revoked(session, first)
+            async with new_async_session() as session:
+                await other.revoke(session, second, expires_at)
+            async with new_async_session() as session:
+                revoked = await ahead.is_revoked(session, second)
+                # Entries from earlier syncs are kept
+                still_revoked = await ahead.is_revoked(session, first)
+        await async_engine.dispose()
+        return revoked, still_revoked
+
+    assert asyncio.run(run()) == (True, True)
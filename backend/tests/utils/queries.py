@@ -0,0 +1,15 @@
+from httpx import Response
+
+
+def assert_max_queries(response: Response, limit: int) -> None:
+    """
+    Fail when the request behind response ran more than limit SQL statements.
+
+    Needs DB_QUERY_HEADERS, which the test suite turns on in conftest.py.
+    """
+    count = int(response.headers["X-DB-Queries"])
+    request = response.request
+    assert count <= limit, (
+        f"{request.method} {request.url.path} ran {count} queries, "
+        f"at most {limit} expected"
+    )
@@ -81,6 +81,8 @@ export interface PaginationMeta {
   has_next: boolean;
   /** 是否有上一页 */
   has_prev: boolean;
+  /** 下一页游标 (游标分页时返回) */
+  next_cursor?: string | null;
 }
 
 /**